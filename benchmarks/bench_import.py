@@ -0,0 +1,108 @@
+"""
+Measures the startup cost of the core Config / VSFFrame path, failing if it goes over budget.
+
+Each run imports the package in a fresh interpreter, takes Config and VSFFrame from it and builds a VSFFrame, as a
+short-lived job would. The best of the runs is checked against two budgets: the total time (which is mostly pandas),
+and the time spent in the package's own modules. Optional dependencies, such as selenium or matplotlib, must not be
+imported on this path at all:
+
+    python benchmarks/bench_import.py --budget 1.0 --own-budget 0.1
+
+Exits with a non-zero status if any check fails, so it can be run as a CI gate.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Modules that should only be loaded once a stage needs them
+OPTIONAL_MODULES = ["selenium", "webdriver_manager", "bs4", "requests", "matplotlib", "http.server"]
+
+CORE_PATH = """
+import json, sys, time
+start = time.perf_counter()
+import varstarfinder as vsf
+config = vsf.Config("key", latitude=-33.7738, longitude=151.1126, elevation=61, ut_offset=10)
+frame = vsf.VSFFrame(config)
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": sorted(sys.modules)}))
+"""
+
+
+def run_once() -> dict:
+    """
+    Runs the core path in a fresh interpreter.
+    :return: The total seconds, the modules imported, and the -X importtime report of each import
+    """
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([SRC, os.environ.get("PYTHONPATH", "")])}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", CORE_PATH], env=env, capture_output=True,
+                            text=True, check=True)
+
+    # Each report line is "import time: self [us] | cumulative | module", with the module indented by nesting
+    imports = []
+    for line in result.stderr.splitlines():
+        fields = line[len("import time:"):].split("|") if line.startswith("import time:") else []
+        if len(fields) == 3 and fields[0].strip().isdigit():
+            imports.append((fields[2][1:], int(fields[0]) / 1e6, int(fields[1]) / 1e6))
+
+    return {**json.loads(result.stdout.strip().splitlines()[-1]), "imports": imports}
+
+
+def own_seconds(run: dict) -> float:
+    """
+    :return: The time spent importing the package's own modules, excluding their dependencies
+    """
+    return sum(seconds for module, seconds, _ in run['imports'] if module.strip().startswith("varstarfinder"))
+
+
+def top_imports(run: dict, limit: int) -> list[tuple[str, float]]:
+    """
+    :return: The top level imports with the largest cumulative time, so nested modules aren't counted twice
+    """
+    top = [(module, cumulative) for module, _, cumulative in run['imports'] if not module.startswith(" ")]
+    return sorted(top, key=lambda item: -item[1])[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=1.0, help="Total seconds allowed for the core path")
+    parser.add_argument("--own-budget", type=float, default=0.1,
+                        help="Seconds allowed in the package's own modules")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to run")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to show")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.repeat)]
+    best = min(runs, key=lambda run: run['seconds'])
+    total = best['seconds']
+    own = min(own_seconds(run) for run in runs)
+    loaded = [module for module in OPTIONAL_MODULES if any(module in run['modules'] for run in runs)]
+
+    print(f"core path: {total * 1000:8.1f} ms  (budget {args.budget * 1000:.0f} ms)")
+    print(f"package:   {own * 1000:8.1f} ms  (budget {args.own_budget * 1000:.0f} ms)")
+    print("slowest imports:")
+    for module, seconds in top_imports(best, args.top):
+        print(f"  {module:<30}{seconds * 1000:8.1f} ms")
+
+    failures = []
+    if total > args.budget:
+        failures.append(f"the core path took {total:.3f}s, over the {args.budget:.3f}s budget")
+    if own > args.own_budget:
+        failures.append(f"the package's own modules took {own:.3f}s, over the {args.own_budget:.3f}s budget")
+    if loaded:
+        failures.append(f"optional modules were imported on the core path: {', '.join(loaded)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
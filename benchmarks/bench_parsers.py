@@ -0,0 +1,89 @@
+"""
+Compares the throughput of the VSX ephemeris page parsers, checking that they produce identical output.
+
+Run against a folder of saved VSX ephemeris pages (*.html):
+
+    python benchmarks/bench_parsers.py path/to/pages
+
+or, without a corpus, against synthetic pages in the same layout:
+
+    python benchmarks/bench_parsers.py --synthetic 200
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import time
+from datetime import datetime, timedelta
+
+from varstarfinder._backends import backend_names, get_backend
+from varstarfinder._parsers import ephemeris_table, parse_ephemeris_dates
+
+
+def synthetic_page(n_rows: int, seed: int = 0) -> bytes:
+    """
+    Builds a page laid out like a VSX ephemeris page, with a header, a table of eclipses and a footer.
+    """
+    start = datetime(2022, 9, 19) + timedelta(hours=seed)
+    rows = []
+    for i in range(n_rows):
+        t = start + timedelta(days=1.37 * i)
+        cells = [str(1000 + i)] + [(t + timedelta(hours=h)).strftime("%d %b %Y %H:%M") for h in (0, 1.5, 3)]
+        rows.append("<tr>" + "".join(f'<td class="cell">{c}</td>' for c in cells) + "</tr>")
+
+    return (
+        "<html><head><title>VSX : Ephemeris</title></head><body>"
+        "<table><tr><td>VSX</td><td><b>Ephemeris</b></td><td>&nbsp;</td></tr></table>"
+        "<table><tr><td>Epoch</td><td>Start</td><td>Mid</td><td>End</td><td></td></tr>"
+        + "".join(rows) +
+        "</table><table><tr><td>AAVSO</td><td>&copy; 2022</td></tr></table></body></html>"
+    ).encode()
+
+
+def load_corpus(args) -> list[bytes]:
+    if args.synthetic:
+        return [synthetic_page(args.rows, seed) for seed in range(args.synthetic)]
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.corpus, "*.html"))):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", help="A folder of saved VSX ephemeris pages")
+    parser.add_argument("--synthetic", type=int, default=0, help="Number of synthetic pages to use instead")
+    parser.add_argument("--rows", type=int, default=100, help="Eclipses per synthetic page")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of passes over the corpus")
+    args = parser.parse_args()
+
+    if args.corpus is None and not args.synthetic:
+        parser.error("either a corpus folder or --synthetic is required")
+
+    pages = load_corpus(args)
+    total_bytes = sum(len(page) for page in pages)
+    print(f"{len(pages)} pages, {total_bytes / 1e6:.2f} MB")
+
+    outputs = {}
+    for name in backend_names("parse"):
+        extract = get_backend("parse", name)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            outputs[name] = [parse_ephemeris_dates(ephemeris_table(extract(page), "star")) for page in pages]
+            best = min(best, time.perf_counter() - start)
+
+        print(f"{name:>6}: {len(pages) / best:10.1f} pages/s  {total_bytes / best / 1e6:8.2f} MB/s")
+
+    reference = outputs.pop("bs4")
+    for name, tables in outputs.items():
+        mismatches = sum(not a.equals(b) for a, b in zip(reference, tables))
+        print(f"{name} output {'matches' if mismatches == 0 else f'differs on {mismatches} pages from'} bs4")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmarks each VSFFrame stage against the local fixture server (see server.py), at a range of target counts.
+
+For every stage and target count it reports the throughput (targets per second), the percentiles of the stage
+latency over the repeats and of the individual HTTP requests, and the peak memory allocated. Results are saved to
+benchmarks/results so that versions can be compared:
+
+    python benchmarks/bench_stages.py --counts 10 100 1000 10000 --workers 8 --latency 0.02
+    python benchmarks/bench_stages.py --compare benchmarks/results/<previous>.json
+
+The staralt stages are optional - --plots renders plots locally, and --selenium drives the staralt stand-in with
+Chrome (which must be installed).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+import varstarfinder as vsf
+from server import FixtureServer, FIXTURES
+
+
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+class RequestTimer:
+    def __init__(self, frame: vsf.VSFFrame):
+        """
+        Records the latency of every request made by the pipeline while active, through the instrumentation hooks.
+        """
+        self.latencies = []
+        self._frame = frame
+
+    def __call__(self, event: vsf.StageEvent):
+        if event.stage == "fetch":
+            self.latencies.append(event.seconds)
+
+    def __enter__(self) -> RequestTimer:
+        self._frame.register_hook(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._frame.unregister_hook(self)
+
+
+def percentiles(values: list[float]) -> dict:
+    if len(values) == 0:
+        return {}
+
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99}
+
+
+def measure(frame: vsf.VSFFrame, func, repeat: int) -> tuple[object, dict]:
+    """
+    Runs a stage repeatedly, timing each run, then once more under tracemalloc for its peak memory.
+    :return: The result of the last run, and the measurements
+    """
+    durations = []
+    with RequestTimer(frame) as timer:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {
+        "seconds": percentiles(durations),
+        "requests": len(timer.latencies) // repeat,
+        "request_seconds": percentiles(timer.latencies),
+        "peak_mb": peak / 1e6
+    }
+
+
+def run(args) -> list[dict]:
+    results = []
+
+    for n_targets in args.counts:
+        with FixtureServer(n_targets, args.latency, args.error_rate, args.per_page, args.fixtures) as server:
+            config = vsf.Config("benchmark", latitude=-33.7738, longitude=151.1126, elevation=61, ut_offset=10,
+                                workers=args.workers, backoff=0.01, **server.config_urls(), obs_section=["eb"])
+
+            stages = {}
+            frame = vsf.VSFFrame(config)
+            targets, stages['request_targets'] = measure(frame, lambda: frame.request_targets(), args.repeat)
+            ephemeris, stages['scrape_ephemeris'] = measure(frame, lambda: targets.scrape_ephemeris(), args.repeat)
+            filtered, stages['filter_ephemeris'] = measure(
+                frame, lambda: ephemeris.filter_ephemeris(date_range=args.date_range, time_range=["19:30", "04:00"]),
+                args.repeat)
+
+            with tempfile.TemporaryDirectory() as export:
+                if args.plots:
+                    _, stages['render_staralt_plots'] = measure(
+                        frame, lambda: filtered.render_staralt_plots(export), args.repeat)
+
+                if args.selenium:
+                    _, stages['scrape_staralt_plots'] = measure(
+                        frame, lambda: filtered.scrape_staralt_plots(export), 1)
+
+            for stage, stats in stages.items():
+                stats.update({"stage": stage, "n_targets": n_targets,
+                              "targets_per_second": n_targets / stats['seconds']['p50']})
+                results.append(stats)
+
+                print(f"{stage:>22} {n_targets:>6} targets: {stats['targets_per_second']:10.1f} targets/s  "
+                      f"p50 {stats['seconds']['p50']:8.3f}s  p95 {stats['seconds']['p95']:8.3f}s  "
+                      f"peak {stats['peak_mb']:8.1f} MB  {stats['requests']:>6} requests")
+
+    return results
+
+
+def compare(results: list[dict], previous_path: str):
+    with open(previous_path) as f:
+        previous = {(r['stage'], r['n_targets']): r for r in json.load(f)['results']}
+
+    print(f"\nCompared to {previous_path} (ratio of p50 latency, below 1 is faster):")
+    for r in results:
+        old = previous.get((r['stage'], r['n_targets']))
+        if old is not None:
+            ratio = r['seconds']['p50'] / old['seconds']['p50']
+            print(f"{r['stage']:>22} {r['n_targets']:>6} targets: {ratio:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000, 10000], help="Target counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs of each stage")
+    parser.add_argument("--workers", type=int, default=8, help="Config.workers for the fetching stages")
+    parser.add_argument("--latency", type=float, default=0, help="Delay added to each response, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0, help="Probability of a 503 response")
+    parser.add_argument("--per-page", type=int, default=None, help="Paginate the targets response")
+    parser.add_argument("--date-range", nargs=2, default=["2022-09-19", "2022-10-10"], help="filter_ephemeris range")
+    parser.add_argument("--fixtures", default=FIXTURES, help="Folder of recorded responses")
+    parser.add_argument("--plots", action="store_true", help="Benchmark render_staralt_plots")
+    parser.add_argument("--selenium", action="store_true", help="Benchmark scrape_staralt_plots (needs Chrome)")
+    parser.add_argument("--compare", help="A previous results file to compare against")
+    parser.add_argument("--output", help="Where to save the results (defaults to benchmarks/results)")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    output = args.output or os.path.join(RESULTS, f"{vsf.__version__}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"version": vsf.__version__, "python": platform.python_version(), "args": vars(args),
+                   "results": results}, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+A local stand-in for the AAVSO Target Tool API, VSX ephemeris pages and the staralt website, for benchmarking the
+VSFFrame stages without hitting the live services.
+
+Recorded responses are replayed from a fixtures folder:
+    targets.json      a Target Tool API response, whose targets are repeated (with unique names) up to n_targets
+    ephemeris/*.html  saved VSX ephemeris pages, served in rotation for each star
+
+Run it on its own with:
+
+    python benchmarks/server.py --targets 1000 --latency 0.05 --error-rate 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import copy
+import glob
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# A 1x1 transparent GIF, returned by the staralt stand-in
+GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+STARALT_FORM = """<html><body><form method="post" action="/staralt/">
+<select name="form[day]">{days}</select>
+<select name="form[month]">{months}</select>
+<select name="form[year]">{years}</select>
+<input name="form[sitecoord]"><textarea name="form[coordlist]"></textarea>
+<select name="form[format]"><option>GIF [attachment]</option></select>
+<input type="submit" name="submit">
+</form></body></html>"""
+
+
+class FixtureServer:
+    def __init__(self, n_targets: int = 100, latency: float = 0, error_rate: float = 0, per_page: int = None,
+                 fixtures: str = FIXTURES, port: int = 0, seed: int = 0):
+        """
+        A threaded HTTP server replaying recorded responses, with configurable latency and errors.
+        :param n_targets: The number of targets returned by the targets endpoint
+        :param latency: The delay added to every response, in seconds
+        :param error_rate: The probability of a request failing with a 503 (which clients should retry)
+        :param per_page: Splits the targets response into pages of this size (None for a single response)
+        :param fixtures: The folder of recorded responses
+        :param port: The port to listen on (0 picks a free one)
+        :param seed: The seed for the simulated errors
+        """
+        self.n_targets = n_targets
+        self.latency = latency
+        self.error_rate = error_rate
+        self.per_page = per_page
+
+        with open(os.path.join(fixtures, "targets.json")) as f:
+            self._records = json.load(f)['targets']
+
+        self._pages = []
+        for path in sorted(glob.glob(os.path.join(fixtures, "ephemeris", "*.html"))):
+            with open(path, "rb") as f:
+                self._pages.append(f.read())
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self) -> FixtureServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def config_urls(self) -> dict:
+        """
+        :return: The Config URL options that point the package at this server
+        """
+        return {
+            "targets_url": f"{self.url}/targets",
+            "vsx_url": f"{self.url}/vsx",
+            "staralt_url": f"{self.url}/staralt/"
+        }
+
+    def target(self, i: int) -> dict:
+        record = copy.deepcopy(self._records[i % len(self._records)])
+        record['star_name'] = f"{record['star_name']} #{i}"
+        record['other_info'] = record['other_info'].replace("&oid=", f"&oid={i}-") \
+            if "ephemeris" in record['other_info'] else record['other_info']
+
+        return record
+
+    def targets_response(self, page: int) -> dict:
+        if self.per_page is None:
+            return {"targets": [self.target(i) for i in range(self.n_targets)]}
+
+        start = (page - 1) * self.per_page
+        targets = [self.target(i) for i in range(start, min(start + self.per_page, self.n_targets))]
+
+        return {"targets": targets, "pages": -(-self.n_targets // self.per_page)}
+
+    def ephemeris_response(self, oid: str) -> bytes:
+        return self._pages[zlib.crc32(oid.encode()) % len(self._pages)]
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            return self.error_rate > 0 and self._random.random() < self.error_rate
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if server._should_fail():
+                    return self._send(503, b"Service Unavailable", "text/plain")
+
+                url = urlsplit(self.path)
+                query = dict(parse_qsl(url.query))
+
+                if url.path == "/targets":
+                    body = json.dumps(server.targets_response(int(query.get("page", 1)))).encode()
+                    return self._send(200, body, "application/json")
+
+                if url.path == "/vsx/index.php":
+                    return self._send(200, server.ephemeris_response(query.get("oid", "")), "text/html")
+
+                if url.path == "/staralt/":
+                    body = STARALT_FORM.format(
+                        days="".join(f"<option>{d:02d}</option>" for d in range(1, 32)),
+                        months="".join(f"<option>{time.strftime('%B', (2000, m, 1, 0, 0, 0, 0, 1, 0))}</option>"
+                                       for m in range(1, 13)),
+                        years="".join(f"<option>{y}</option>" for y in range(2000, 2051)))
+                    return self._send(200, body.encode(), "text/html")
+
+                self._send(404, b"Not Found", "text/plain")
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                self._send(200, GIF, "image/gif", {"Content-Disposition": 'attachment; filename="image.gif"'})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", type=int, default=100, help="Number of targets to serve")
+    parser.add_argument("--latency", type=float, default=0, help="Delay added to each response, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0, help="Probability of a 503 response")
+    parser.add_argument("--per-page", type=int, default=None, help="Paginate the targets response")
+    parser.add_argument("--fixtures", default=FIXTURES, help="Folder of recorded responses")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    with FixtureServer(args.targets, args.latency, args.error_rate, args.per_page, args.fixtures, args.port) as server:
+        print(f"Serving on {server.url} - press Ctrl+C to stop")
+        for key, value in server.config_urls().items():
+            print(f"  {key}={value!r}")
+
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
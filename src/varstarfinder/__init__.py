@@ -35,6 +35,36 @@ purposes.
 from .__version__ import __title__, __description__, __url__, __version__
 from .__version__ import __author__, __author_email__, __license__, __copyright__
 
-from .vsfframe import VSFFrame
+import importlib
+
 from .config import Config
-from .exceptions import OrderError
+from .exceptions import OrderError, CacheMissError
+
+# Everything else is imported on first access (PEP 562), so that importing the package stays quick
+_LAZY_ATTRIBUTES = {
+    "VSFFrame": ".vsfframe",
+    "LazyVSFFrame": ".lazy",
+    "plan_sites": ".batch",
+    "CatalogueStore": ".store",
+    "PlannerService": ".service",
+    "StageEvent": "._instrument",
+    "SummaryReporter": "._instrument",
+    "TraceRecorder": "._instrument",
+    "register_backend": "._backends"
+}
+
+__all__ = ["Config", "OrderError", "CacheMissError", *_LAZY_ATTRIBUTES]
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
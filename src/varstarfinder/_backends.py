@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import Any
+
+
+# Backends are named by "module:attribute" and only imported when a stage first asks for them, so that heavy
+# dependencies such as selenium or matplotlib aren't loaded by jobs that never use them
+BACKENDS = {
+    "fetch": {
+        "requests": "._http:HttpClient"
+    },
+    "parse": {
+        "fast": "._parsers:td_texts_fast",
+        "bs4": "._parsers:td_texts_bs4"
+    },
+    "plot": {
+        "matplotlib": "._staralt:render_nights",
+        "selenium": "._selenium:scrape_nights"
+    }
+}
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def register_backend(kind: str, name: str, backend: str | Any):
+    """
+    Adds a backend, or replaces an existing one.
+        fetch  a class taking the Config, used as a context manager with the get, map and imap methods of HttpClient
+        parse  a function taking the raw content of an ephemeris page, returning the text of each table cell
+        plot   a function taking the (date, stars) groups of each night, the site parameters and an export folder
+    :param kind: The kind of backend ('fetch', 'parse' or 'plot')
+    :param name: The name that the backend is chosen by
+    :param backend: The backend itself, or where to import it from as "module:attribute"
+    """
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown backend kind {kind}, expected one of {list(BACKENDS)}")
+
+    with _lock:
+        BACKENDS[kind][name] = backend
+        _loaded.pop((kind, name), None)
+
+
+def backend_names(kind: str) -> list[str]:
+    """
+    :param kind: The kind of backend
+    :return: The names of the registered backends of that kind
+    """
+    return list(BACKENDS[kind])
+
+
+def get_backend(kind: str, name: str) -> Any:
+    """
+    Loads a backend, importing it on first use.
+    :param kind: The kind of backend
+    :param name: The name of the backend
+    :return: The backend
+    """
+    if (kind, name) in _loaded:
+        return _loaded[(kind, name)]
+
+    if name not in BACKENDS.get(kind, {}):
+        raise ValueError(f"Unknown {kind} backend {name}, expected one of {backend_names(kind)}")
+
+    with _lock:
+        backend = BACKENDS[kind][name]
+
+        if isinstance(backend, str):
+            module, attribute = backend.split(":")
+            backend = getattr(importlib.import_module(module, __package__), attribute)
+
+        _loaded[(kind, name)] = backend
+
+    return backend
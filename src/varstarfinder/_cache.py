@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+# Eviction frees space down to this fraction of max_size, so a full cache isn't scanned again on every put
+EVICT_TARGET = 0.9
+
+
+class ResponseCache:
+    def __init__(self, directory: str, ttl: float | None = None, max_size: int | None = None):
+        """
+        A persistent on-disk cache of raw HTTP responses, keyed by URL and query parameters. Entries expire after ttl
+        seconds, and the least recently used entries are evicted once the cache grows past max_size bytes.
+        :param directory: The folder that cached responses are stored in
+        :param ttl: The number of seconds a response stays valid for (None to never expire)
+        :param max_size: The maximum total size of the cache in bytes (None for no limit)
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+
+        os.makedirs(directory, exist_ok=True)
+
+        # A running total of the cache size, so the folder is only scanned when it needs evicting
+        self._lock = threading.Lock()
+        self._size = sum(size for _, size, _ in self._entries()) if max_size is not None else 0
+
+    @staticmethod
+    def key(url: str, params: dict = None) -> str:
+        """
+        Builds the cache key for a request. Parameters are sorted so that their order does not matter.
+        :param url: The requested URL
+        :param params: The query parameters of the request
+        :return: A hex digest identifying the request
+        """
+        raw = json.dumps([url, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def get(self, url: str, params: dict = None) -> bytes | None:
+        """
+        Retrieves a cached response, marking it as recently used.
+        :param url: The requested URL
+        :param params: The query parameters of the request
+        :return: The raw response content, or None if it is missing or has expired
+        """
+        path = self._path(self.key(url, params))
+
+        try:
+            modified = os.path.getmtime(path)
+
+            if self.ttl is not None and time.time() - modified > self.ttl:
+                return None
+
+            with open(path, "rb") as f:
+                content = f.read()
+
+            # The access time tracks recent use for LRU eviction, while the modified time tracks expiry
+            os.utime(path, (time.time(), modified))
+        except FileNotFoundError:
+            return None
+
+        return content
+
+    def put(self, url: str, content: bytes, params: dict = None):
+        """
+        Stores a response. If the cache is over its size limit, the least recently used entries are evicted until
+        it is back under EVICT_TARGET of the limit.
+        :param url: The requested URL
+        :param content: The raw response content
+        :param params: The query parameters of the request
+        """
+        # Write to a temporary file first so that concurrent readers never see a partial response
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+
+        path = self._path(self.key(url, params))
+        with self._lock:
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+
+            os.replace(tmp_path, path)
+
+            if self.max_size is not None:
+                self._size += len(content) - replaced
+                if self._size > self.max_size:
+                    self._evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".bin"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+
+        return entries
+
+    def _evict(self):
+        # Rescan rather than trusting the running total, in case another process shares the folder
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_size * EVICT_TARGET:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            total -= size
+
+        self._size = total
+
+    def clear(self):
+        """
+        Removes every cached response.
+        """
+        with self._lock:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".bin"):
+                    os.remove(entry.path)
+
+            self._size = 0
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Iterator
+
+import pandas as pd
+
+
+class EphemerisCheckpoint:
+    def __init__(self, path: str):
+        """
+        An append-only record of the ephemeris data scraped for each star, stored as one JSON line per star. Stars
+        without any ephemeris data are recorded too, so that they aren't fetched again on resuming.
+        :param path: The path of the checkpoint file
+        """
+        self.path = path
+        self._repair()
+
+    def _repair(self):
+        # An interrupted run can leave a partially written final line, which is dropped so new lines can be appended
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as f:
+            content = f.read()
+
+        end = content.rfind(b"\n") + 1
+        if end < len(content):
+            with open(self.path, "wb") as f:
+                f.write(content[:end])
+
+    def read(self) -> Iterator[tuple[str, pd.DataFrame | None]]:
+        """
+        Streams the stars that have already been completed, one at a time.
+        :return: An iterator of the star names and their ephemeris data (None if the star had none)
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r") as f:
+            for line in f:
+                record = json.loads(line)
+                vals = record['data']
+
+                if vals is not None:
+                    vals = pd.DataFrame(columns=vals['columns'], data=vals['data'])
+                    for col in ['start', 'mid', 'end']:
+                        if col in vals:
+                            vals[col] = pd.to_datetime(vals[col])
+
+                yield record['star_name'], vals
+
+    def append(self, star_name: str, vals: pd.DataFrame | None):
+        """
+        Records the ephemeris data of a completed star.
+        :param star_name: The name of the star
+        :param vals: The ephemeris data of the star (None if it had none)
+        """
+        data = json.loads(vals.to_json(orient="split", index=False, date_format="iso")) if vals is not None else None
+
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"star_name": star_name, "data": data}) + "\n")
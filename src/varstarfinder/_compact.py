@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+def downcast(table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Stores the numeric columns of a table in the smallest types that hold them. Floats are only narrowed when no
+    precision would be lost.
+    :param table: The table to downcast (modified in place)
+    :return: The same table
+    """
+    for col in table.columns:
+        values = table[col]
+
+        if pd.api.types.is_bool_dtype(values):
+            continue
+        elif pd.api.types.is_integer_dtype(values):
+            table[col] = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(values):
+            narrowed = values.astype(np.float32)
+            if np.array_equal(narrowed.to_numpy(dtype=np.float64), values.to_numpy(dtype=np.float64), equal_nan=True):
+                table[col] = narrowed
+
+    return table
+
+
+class CompactEphemeris:
+    def __init__(self, targets: pd.DataFrame, eclipses: pd.DataFrame):
+        """
+        Ephemeris data stored as two tables rather than one wide one, so that each star's targets data is held once
+        instead of once per eclipse. The eclipse rows line up one to one with the rows of the wide table, including
+        a row of missing times for each star without eclipses.
+        :param targets: The targets data, with one row per star
+        :param eclipses: The eclipse data, keyed to the targets by a categorical star_name whose categories follow the
+            order of the targets
+        """
+        self.targets = targets
+        self.eclipses = eclipses
+
+    @classmethod
+    def from_frames(cls, targets: pd.DataFrame, ephemeris_data: pd.DataFrame) -> CompactEphemeris:
+        """
+        Builds the compact tables that match a left join of the ephemeris data onto the targets.
+        :param targets: The targets data. Only the first row of any repeated star name is kept.
+        :param ephemeris_data: The ephemeris data of each star, in local time
+        :return: The compact ephemeris data
+        """
+        targets = downcast(targets.drop_duplicates("star_name").reset_index(drop=True))
+        stars = pd.CategoricalDtype(targets['star_name'])
+
+        # Joining onto the star names alone gives the rows of the wide join without copying the targets data
+        columns = [c for c in ephemeris_data.columns if c != "ecliptic_period"]
+        eclipses = targets[['star_name']].merge(ephemeris_data[columns], on="star_name", how="left")
+        eclipses['star_name'] = eclipses['star_name'].astype(stars)
+
+        # Name any columns in both tables as a join would
+        overlap = [c for c in columns if c != "star_name" and c in targets]
+        targets = targets.rename(columns={c: f"{c}_x" for c in overlap})
+        eclipses = eclipses.rename(columns={c: f"{c}_y" for c in overlap})
+
+        return cls(targets, downcast(eclipses))
+
+    def __len__(self) -> int:
+        return len(self.eclipses)
+
+    def eclipse_view(self) -> pd.DataFrame:
+        """
+        :return: The eclipse table, with the length of each eclipse in hours, for filtering without the targets data
+        """
+        view = self.eclipses.copy(deep=False)
+        view['ecliptic_period'] = (view['end'] - view['start']).dt.total_seconds() / 3600
+
+        return view
+
+    def take(self, positions: np.ndarray) -> CompactEphemeris:
+        """
+        :param positions: The row positions to keep
+        :return: The compact ephemeris data of the given rows, sharing the targets table
+        """
+        return CompactEphemeris(self.targets, self.eclipses.iloc[positions])
+
+    def materialize(self) -> pd.DataFrame:
+        """
+        Joins the tables into the wide format, with every targets column repeated on each eclipse row.
+        :return: The wide ephemeris data
+        """
+        wide = self.targets.iloc[self.eclipses['star_name'].cat.codes].reset_index(drop=True)
+
+        for col, values in self.eclipse_view().items():
+            if col != "star_name":
+                wide[col] = values.to_numpy()
+
+        wide.index = self.eclipses.index
+        return wide
+
+    def memory_usage(self) -> int:
+        """
+        :return: The memory used by both tables, in bytes
+        """
+        return int(self.targets.memory_usage(deep=True).sum() + self.eclipses.memory_usage(deep=True).sum())
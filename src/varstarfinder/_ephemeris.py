@@ -0,0 +1,80 @@
+from __future__ import annotations
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+# Julian date of 1970-01-01 00:00 UT
+JD_UNIX_EPOCH = 2440587.5
+
+EPHEMERIS_COLUMNS = ["star_name", "epoch", "start", "mid", "end"]
+ELEMENT_COLUMNS = ["star_name", "epoch", "period", "duration"]
+
+
+def jd_to_datetime(jd: np.ndarray) -> pd.DatetimeIndex:
+    """
+    Converts Julian dates into (naive) UT datetimes, rounded to the nearest second.
+    :param jd: An array of Julian dates
+    :return: The corresponding datetimes
+    """
+    return pd.to_datetime(np.round((np.asarray(jd, dtype=float) - JD_UNIX_EPOCH) * 86400), unit="s")
+
+
+def datetime_to_jd(dt: datetime) -> float:
+    """
+    Converts a (naive) UT datetime into a Julian date.
+    :param dt: The datetime to convert
+    :return: The Julian date
+    """
+    return (pd.Timestamp(dt) - pd.Timestamp(0)).total_seconds() / 86400 + JD_UNIX_EPOCH
+
+
+def has_elements(elements: pd.DataFrame) -> pd.Series:
+    """
+    Determines which stars have enough elements for their eclipses to be predicted.
+    :param elements: A table of elements, with the ELEMENT_COLUMNS
+    :return: A boolean mask over the elements
+    """
+    period = pd.to_numeric(elements['period'], errors="coerce")
+    return pd.to_numeric(elements['epoch'], errors="coerce").notna() & (period > 0)
+
+
+def predict_eclipses(elements: pd.DataFrame, start: datetime, end: datetime) -> pd.DataFrame:
+    """
+    Predicts the eclipses of every star in the elements table with a mid-eclipse between start and end (inclusive).
+    All stars are computed together, so the cost depends on the number of eclipses rather than the number of stars.
+
+    :param elements: A table with the columns star_name, epoch (Julian date of a minimum), period (days) and
+        duration (hours, may be missing)
+    :param start: The start of the window, in UT
+    :param end: The end of the window, in UT
+    :return: A table in the same format as the scraped ephemeris data (star_name, epoch, start, mid, end), in UT.
+        The epoch column holds the cycle number of each eclipse, counted from the epoch in the elements.
+    """
+    elements = elements[has_elements(elements)]
+
+    names = elements['star_name'].to_numpy()
+    t0 = pd.to_numeric(elements['epoch']).to_numpy(dtype=float)
+    period = pd.to_numeric(elements['period']).to_numpy(dtype=float)
+    duration = pd.to_numeric(elements['duration'], errors="coerce").to_numpy(dtype=float) / 24
+
+    # The range of cycle numbers that falls inside the window, for each star
+    first = np.ceil((datetime_to_jd(start) - t0) / period).astype(np.int64)
+    last = np.floor((datetime_to_jd(end) - t0) / period).astype(np.int64)
+    counts = np.clip(last - first + 1, 0, None)
+
+    # Expand every star into one row per cycle
+    star_idx = np.repeat(np.arange(len(names)), counts)
+    cycle = first[star_idx] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    mid = t0[star_idx] + cycle * period[star_idx]
+    half_duration = duration[star_idx] / 2
+
+    return pd.DataFrame({
+        "star_name": names[star_idx],
+        "epoch": cycle,
+        "start": jd_to_datetime(mid - half_duration),
+        "mid": jd_to_datetime(mid),
+        "end": jd_to_datetime(mid + half_duration)
+    })
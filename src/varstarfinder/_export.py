@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+
+def _to_excel(data: pd.DataFrame, path: str):
+    data.to_excel(path, index=False)
+
+
+def _to_csv(data: pd.DataFrame, path: str):
+    data.to_csv(path, index=False)
+
+
+def _to_parquet(data: pd.DataFrame, path: str):
+    data.to_parquet(path, index=False)
+
+
+def _to_feather(data: pd.DataFrame, path: str):
+    # Feather only supports the default index
+    data.reset_index(drop=True).to_feather(path)
+
+
+# Export formats, chosen by file extension. Parquet and Feather need pyarrow to be installed.
+EXPORTERS = {
+    ".xlsx": _to_excel,
+    ".csv": _to_csv,
+    ".parquet": _to_parquet,
+    ".feather": _to_feather,
+    ".arrow": _to_feather
+}
+
+_executor = None
+_pending = []
+_lock = threading.Lock()
+
+
+def check_export_path(path: str | None) -> str | None:
+    """
+    Checks that a dataset can be exported to a path, so that stages can fail before doing any work.
+    :param path: The path to export to (None for no export)
+    :return: The file extension, or None if there is no export
+    """
+    if path is None:
+        return None
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORTERS:
+        raise ValueError(f"Unsupported export format {extension}, expected one of {list(EXPORTERS)}")
+
+    return extension
+
+
+def export_data(data: pd.DataFrame, path: str, background: bool = False) -> Future | None:
+    """
+    Exports a dataset to a file, in the format given by the file extension.
+    :param data: The dataset to export
+    :param path: The path to export to
+    :param background: Whether to write the file on a background thread, rather than waiting for it. The dataset is
+        copied first, so later changes to it can't race with the write.
+    :return: A Future for the export if it is running in the background
+    """
+    extension = check_export_path(path)
+
+    if not background:
+        EXPORTERS[extension](data, path)
+        return None
+
+    global _executor
+    with _lock:
+        # A single thread keeps exports to the same path in the order they were requested
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="varstarfinder-export")
+
+        future = _executor.submit(EXPORTERS[extension], data.copy(), path)
+        _pending.append(future)
+
+    return future
+
+
+def wait_for_exports():
+    """
+    Waits for every background export to finish, raising the first error encountered (if any).
+    """
+    with _lock:
+        pending = list(_pending)
+        _pending.clear()
+
+    for future in pending:
+        future.result()
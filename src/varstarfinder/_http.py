@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import Config
+from .exceptions import CacheMissError
+
+
+# Status codes that are worth retrying - anything else is returned (or raised) straight away
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class _RateLimiter:
+    def __init__(self, rate: float | None):
+        """
+        Spaces out requests to the same host so that no more than `rate` requests are started per second.
+        :param rate: The maximum number of requests per second, per host. None disables the limit.
+        """
+        self._interval = 1 / rate if rate else 0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str):
+        if not self._interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self._interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class HttpClient:
+    def __init__(self, config: Config):
+        """
+        A pooled HTTP client shared by the scraping stages. Connections are kept alive between requests, requests to
+        the same host are rate limited, and transient failures are retried with exponential backoff. Responses are
+        served from the Config cache when one has been set up.
+        :param config: A Config object containing the fetching options
+        """
+        self._config = config
+        self._limiter = _RateLimiter(config.rate_limit)
+
+        adapter = HTTPAdapter(pool_connections=config.workers, pool_maxsize=config.workers)
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def __enter__(self) -> HttpClient:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._session.close()
+
+    def get(self, url: str, params: dict = None, **kwargs) -> bytes:
+        """
+        Performs a GET request, checking the cache first.
+        :param url: The URL to request
+        :param params: The query parameters of the request
+        :param kwargs: Additional arguments passed to requests.Session.get
+        :return: The raw response content
+        """
+        cache = self._config.cache
+
+        with self._config.instrumentation.span("fetch", detail=url) as span:
+            if cache is not None:
+                content = cache.get(url, params)
+                if content is not None:
+                    span.update(bytes=len(content), cache_hit=True)
+                    return content
+
+            if self._config.offline:
+                raise CacheMissError(url)
+
+            response, retries = self._request(url, params=params, **kwargs)
+            content = response.content
+            span.update(bytes=len(content), cache_hit=False, retries=retries)
+
+        if cache is not None:
+            cache.put(url, content, params)
+
+        return content
+
+    def _request(self, url: str, **kwargs) -> tuple[requests.Response, int]:
+        """
+        Performs a GET request, retrying connection errors and retryable status codes.
+        :param url: The URL to request
+        :param kwargs: Additional arguments passed to requests.Session.get
+        :return: The successful response, and the number of retries it took
+        """
+        host = urlsplit(url).netloc
+        kwargs.setdefault("timeout", self._config.timeout)
+
+        for attempt in range(self._config.retries + 1):
+            self._limiter.wait(host)
+
+            try:
+                response = self._session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self._config.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self._config.retries:
+                    response.raise_for_status()
+                    return response, attempt
+
+            time.sleep(self._config.backoff * 2 ** attempt)
+
+    def map(self, func: Callable, *iterables: Iterable) -> list:
+        """
+        Applies func over the iterables using the configured number of workers. Results are returned in the same
+        order as the inputs, regardless of the order the requests complete in.
+        :param func: The function to apply
+        :param iterables: The arguments to func, as in the builtin map
+        :return: A list of results
+        """
+        if self._config.workers <= 1:
+            return list(map(func, *iterables))
+
+        with ThreadPoolExecutor(max_workers=self._config.workers) as executor:
+            return list(executor.map(func, *iterables))
+
+    def imap(self, func: Callable, *iterables: Iterable) -> Iterator:
+        """
+        A lazy version of map, which yields results in input order as they become available. Only a few batches of
+        requests are in flight at once, so memory use doesn't grow with the number of inputs.
+        :param func: The function to apply
+        :param iterables: The arguments to func, as in the builtin map
+        :return: An iterator of results
+        """
+        if self._config.workers <= 1:
+            yield from map(func, *iterables)
+            return
+
+        args = zip(*iterables)
+        with ThreadPoolExecutor(max_workers=self._config.workers) as executor:
+            while batch := list(islice(args, self._config.workers * 4)):
+                yield from executor.map(func, *zip(*batch))
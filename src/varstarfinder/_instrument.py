@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+
+@dataclass
+class StageEvent:
+    """
+    A timed step of the pipeline. Stages are the VSFFrame methods, and sub-steps are 'fetch' (one per HTTP request),
+    'parse' and 'parse_dates' (one per ephemeris page), 'merge' and 'export'. Fields that don't apply are None.
+    """
+    stage: str
+    start: float
+    seconds: float
+    thread: int
+    rows: int = None
+    bytes: int = None
+    cache_hit: bool = None
+    retries: int = None
+    detail: str = None
+
+
+class _Span:
+    def __init__(self, instrumentation: Instrumentation, stage: str, fields: dict):
+        self._instrumentation = instrumentation
+        self._stage = stage
+        self._fields = fields
+
+    def update(self, **fields):
+        self._fields.update(fields)
+
+    def __enter__(self) -> _Span:
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        self._instrumentation.emit(StageEvent(self._stage, self._start, end - self._start, threading.get_ident(),
+                                              **self._fields))
+
+
+class _NullSpan:
+    """
+    Stands in for a span when no hooks are registered, so instrumented code costs next to nothing.
+    """
+    def update(self, **fields):
+        pass
+
+    def __enter__(self) -> _NullSpan:
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Instrumentation:
+    def __init__(self):
+        """
+        Passes a StageEvent to every registered hook as each stage and sub-step of the pipeline completes.
+        """
+        self._hooks = []
+
+    @property
+    def active(self) -> bool:
+        return len(self._hooks) > 0
+
+    def register(self, hook: Callable[[StageEvent], None]):
+        self._hooks.append(hook)
+
+    def unregister(self, hook: Callable[[StageEvent], None]):
+        self._hooks.remove(hook)
+
+    def span(self, stage: str, **fields) -> _Span | _NullSpan:
+        """
+        Times the enclosed block, emitting an event for it on exit. Further fields can be added with update.
+        :param stage: The name of the stage or sub-step
+        :param fields: Fields of the StageEvent, such as rows or detail
+        :return: A context manager for the span
+        """
+        if not self._hooks:
+            return _NULL_SPAN
+
+        return _Span(self, stage, fields)
+
+    def emit(self, event: StageEvent):
+        for hook in self._hooks:
+            hook(event)
+
+
+def instrumented(method: Callable) -> Callable:
+    """
+    Wraps a VSFFrame stage in a span named after the method, recording the number of rows it returns.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = self._config.instrumentation
+        if not instrumentation.active:
+            return method(self, *args, **kwargs)
+
+        with instrumentation.span(method.__name__) as span:
+            result = method(self, *args, **kwargs)
+            span.update(rows=len(result) if hasattr(result, "__len__") else None)
+
+        return result
+
+    return wrapper
+
+
+class SummaryReporter:
+    def __init__(self):
+        """
+        A hook that totals the events of each stage, for a summary of where the time went.
+        """
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: StageEvent):
+        with self._lock:
+            total = self.totals.setdefault(event.stage, {"calls": 0, "seconds": 0.0, "rows": 0, "bytes": 0,
+                                                         "cache_hits": 0, "retries": 0})
+            total['calls'] += 1
+            total['seconds'] += event.seconds
+            total['rows'] += event.rows or 0
+            total['bytes'] += event.bytes or 0
+            total['cache_hits'] += 1 if event.cache_hit else 0
+            total['retries'] += event.retries or 0
+
+    def report(self) -> str:
+        """
+        :return: A table of the totals for each stage, slowest first. Sub-steps that run concurrently (such as
+            fetches) can add up to more than the time of the stage they belong to.
+        """
+        lines = [f"{'stage':<22}{'calls':>8}{'seconds':>11}{'rows':>10}{'bytes':>13}{'cache hits':>12}{'retries':>9}"]
+        for stage, total in sorted(self.totals.items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"{stage:<22}{total['calls']:>8}{total['seconds']:>11.3f}{total['rows']:>10}"
+                         f"{total['bytes']:>13}{total['cache_hits']:>12}{total['retries']:>9}")
+
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        return self.report()
+
+
+class TraceRecorder:
+    def __init__(self):
+        """
+        A hook that records every event, for viewing as a timeline in chrome://tracing or https://ui.perfetto.dev.
+        """
+        self.events = []
+
+    def __call__(self, event: StageEvent):
+        self.events.append(event)
+
+    def dump(self, path: str):
+        """
+        Writes the recorded events in the Trace Event Format.
+        :param path: The path of the JSON trace file
+        """
+        trace = [{
+            "name": event.stage,
+            "ph": "X",
+            "ts": event.start * 1e6,
+            "dur": event.seconds * 1e6,
+            "pid": 0,
+            "tid": event.thread,
+            "args": {key: value for key, value in asdict(event).items()
+                     if key not in ("stage", "start", "seconds", "thread") and value is not None}
+        } for event in self.events]
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace}, f)
+
+
+@contextmanager
+def profile(path: str = None, sort: str = "cumulative", limit: int = 30):
+    """
+    Profiles the enclosed block with cProfile.
+    :param path: A path to dump the profile to, for tools such as snakeviz. If None, the top functions are printed.
+    :param sort: How to sort the printed functions
+    :param limit: The number of printed functions
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+
+        if path is not None:
+            profiler.dump_stats(path)
+        else:
+            pstats.Stats(profiler).sort_stats(sort).print_stats(limit)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+QUERY_TYPES = ("overlap", "within", "contains")
+
+
+class EclipseIntervals:
+    def __init__(self, start: pd.Series, end: pd.Series):
+        """
+        An index over eclipse windows for fast overlap and containment queries. Windows are sorted by their start,
+        and since no eclipse lasts longer than the longest one, only the windows starting within that duration of a
+        query need to be checked.
+        :param start: The start time of each eclipse
+        :param end: The end time of each eclipse
+        """
+        start = pd.to_datetime(start).to_numpy(dtype="datetime64[ns]")
+        end = pd.to_datetime(end).to_numpy(dtype="datetime64[ns]")
+
+        # Eclipses missing either end can't be placed, so are never returned
+        valid = np.flatnonzero(~(np.isnat(start) | np.isnat(end)))
+        order = np.argsort(start[valid], kind="stable")
+
+        self.positions = valid[order]
+        self.starts = start[self.positions]
+        self.ends = end[self.positions]
+        self.max_duration = (self.ends - self.starts).max() if len(self.positions) > 0 else np.timedelta64(0, "ns")
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def query_many(self, starts, ends, how: str = "overlap") -> tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the eclipses matching each of many query windows at once.
+        :param starts: The start of each query window
+        :param ends: The end of each query window
+        :param how: 'overlap' for eclipses overlapping the window, 'within' for eclipses lying entirely inside it, or
+            'contains' for eclipses spanning the whole window
+        :return: The index of the query window and the row position of each match, ordered by window then start time
+        """
+        if how not in QUERY_TYPES:
+            raise ValueError(f"Unknown query type {how}, expected one of {list(QUERY_TYPES)}")
+
+        q_start = pd.to_datetime(pd.Series(starts)).to_numpy(dtype="datetime64[ns]")
+        q_end = pd.to_datetime(pd.Series(ends)).to_numpy(dtype="datetime64[ns]")
+
+        # Candidate eclipses are those starting in a bounded range around each window
+        lower = q_start if how == "within" else q_end - self.max_duration if how == "contains" \
+            else q_start - self.max_duration
+        upper = q_end if how != "contains" else q_start
+
+        lo = np.searchsorted(self.starts, lower, side="left")
+        hi = np.searchsorted(self.starts, upper, side="right")
+        counts = np.clip(hi - lo, 0, None)
+
+        window = np.repeat(np.arange(len(q_start)), counts)
+        candidate = lo[window] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        if how == "overlap":
+            keep = self.ends[candidate] >= q_start[window]
+        elif how == "within":
+            keep = self.ends[candidate] <= q_end[window]
+        else:
+            keep = self.ends[candidate] >= q_end[window]
+
+        return window[keep], self.positions[candidate[keep]]
+
+    def query(self, start, end, how: str = "overlap") -> np.ndarray:
+        """
+        Finds the eclipses matching a query window.
+        :param start: The start of the window
+        :param end: The end of the window
+        :param how: The type of query, as in query_many
+        :return: The row positions of the matching eclipses, ordered by start time
+        """
+        return self.query_many([start], [end], how)[1]
+
+    def stab(self, t) -> np.ndarray:
+        """
+        Finds the eclipses in progress at a given time.
+        :param t: The time
+        :return: The row positions of the matching eclipses, ordered by start time
+        """
+        return self.query(t, t, "overlap")
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import html
+import re
+
+import pandas as pd
+
+from ._backends import get_backend
+from ._utils import parse_dates
+
+
+_TD_PATTERN = re.compile(rb"<td\b[^>]*>(.*?)</td\s*>", re.IGNORECASE | re.DOTALL)
+_TD_OPEN_PATTERN = re.compile(rb"<td\b", re.IGNORECASE)
+_TAG_PATTERN = re.compile(r"<[^>]*>")
+
+
+def td_texts_bs4(content: bytes) -> list[str]:
+    """
+    Extracts the text of every table cell in a page, by building a full BeautifulSoup tree.
+    :param content: The raw page content
+    :return: The text of each <td> element, in document order
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, 'html.parser')
+    return [element.text for element in soup.find_all("td")]
+
+
+def td_texts_fast(content: bytes) -> list[str]:
+    """
+    Extracts the text of every table cell in a page with a single regular expression pass, without building a tree.
+    Only handles flat tables with explicitly closed cells, raising a ValueError for anything else.
+    :param content: The raw page content
+    :return: The text of each <td> element, in document order
+    """
+    cells = _TD_PATTERN.findall(content)
+
+    # Nested or unclosed cells would be split differently to a real parser
+    if len(cells) != len(_TD_OPEN_PATTERN.findall(content)):
+        raise ValueError("Page contains nested or unclosed table cells")
+
+    return [html.unescape(_TAG_PATTERN.sub("", cell.decode("utf-8", errors="replace"))) for cell in cells]
+
+
+def td_texts(content: bytes, parser: str = "fast") -> list[str]:
+    """
+    Extracts the text of every table cell in a page, falling back to BeautifulSoup if the chosen parser fails.
+    :param content: The raw page content
+    :param parser: The name of the parse backend to use
+    :return: The text of each <td> element, in document order
+    """
+    extract = get_backend("parse", parser)
+
+    try:
+        return extract(content)
+    except ValueError:
+        return td_texts_bs4(content)
+
+
+def ephemeris_table(cells: list[str], star_name: str) -> pd.DataFrame:
+    """
+    Formats the table cells of a VSX ephemeris page into a usable pandas DataFrame
+    :param cells: The text of every table cell on the page
+    :param star_name: The name of the star, added as a joining ID
+    :return: The ephemeris data, with one row per eclipse and the values left as strings
+    """
+    # Remove the header / footer values
+    vals = cells[3:-2]
+    row_length = vals.index("")
+
+    vals = [val for val in vals if val != ""]
+
+    # Remove titles, and split the remaining values into columns
+    cols = [str.lower(x) for x in vals[0:row_length]]
+    vals = vals[row_length:]
+
+    if len(vals) % row_length != 0:
+        raise ValueError(f"Ephemeris table for {star_name} has {len(vals)} values, which don't fit into "
+                         f"{row_length} columns")
+
+    table = {"star_name": [star_name] * (len(vals) // row_length)}
+    for i, col in enumerate(cols):
+        table[col] = vals[i::row_length]
+
+    return pd.DataFrame(table)
+
+
+def parse_ephemeris_dates(table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the date columns of an ephemeris table (every column after the ID and epoch) into datetime64
+    :param table: The ephemeris table, as returned by ephemeris_table
+    :return: The same table, with typed date columns
+    """
+    for col in table.columns[2:]:
+        table[col] = parse_dates(table[col])
+
+    return table
+
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def greedy_schedule(starts: np.ndarray, ends: np.ndarray, gap: int = 0) -> np.ndarray:
+    """
+    Picks the largest set of non-overlapping intervals, by repeatedly taking the interval that ends first.
+    :param starts: The start of each interval, as integers
+    :param ends: The end of each interval, as integers
+    :param gap: The time needed between the end of one interval and the start of the next
+    :return: The positions of the chosen intervals, in order of time
+    """
+    order = np.lexsort((starts, ends))
+    chosen = []
+    last_end = None
+
+    for i, start, end in zip(order.tolist(), starts[order].tolist(), ends[order].tolist()):
+        if last_end is None or start - gap >= last_end:
+            chosen.append(i)
+            last_end = end
+
+    return np.array(chosen, dtype=int)
+
+
+def weighted_schedule(starts: np.ndarray, ends: np.ndarray, weights: np.ndarray, gap: int = 0) -> np.ndarray:
+    """
+    Picks the set of non-overlapping intervals with the greatest total weight, by dynamic programming over the
+    intervals in order of their end. The latest compatible interval before each one is found with a binary search.
+    :param starts: The start of each interval, as integers
+    :param ends: The end of each interval, as integers
+    :param weights: The weight of each interval
+    :param gap: The time needed between the end of one interval and the start of the next
+    :return: The positions of the chosen intervals, in order of time
+    """
+    order = np.lexsort((starts, ends))
+    starts, ends, weights = starts[order], ends[order], np.asarray(weights, dtype=float)[order]
+
+    # The number of intervals finishing in time for each one to start
+    previous = np.minimum(np.searchsorted(ends, starts - gap, side="right"), np.arange(len(order))).tolist()
+
+    # best[j] is the greatest weight using only the first j intervals
+    best = [0.0] * (len(order) + 1)
+    for j, (p, weight) in enumerate(zip(previous, weights.tolist())):
+        best[j + 1] = max(best[j], weight + best[p])
+
+    # Walk back through the table to recover the chosen intervals
+    chosen = []
+    j = len(order)
+    while j > 0:
+        if weights[j - 1] + best[previous[j - 1]] > best[j - 1]:
+            chosen.append(order[j - 1])
+            j = previous[j - 1]
+        else:
+            j -= 1
+
+    return np.array(chosen[::-1], dtype=int)
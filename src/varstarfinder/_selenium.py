@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+import re
+import time
+from datetime import date
+from os.path import abspath
+
+import pandas as pd
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import Select
+from webdriver_manager.chrome import ChromeDriverManager
+
+
+def staralt_coords(stars: pd.DataFrame) -> str:
+    """
+    Formats the stars of a night for the staralt coordinate list
+    :param stars: The star_name, ra and dec of each star
+    :return: One line per star, with spaces in the names replaced by underscores
+    """
+    stars = stars.copy()
+    stars['star_name'] = stars['star_name'].str.replace(' ', '_')
+
+    star_string = stars.to_string(header=False, index=False, index_names=False)
+    return re.sub("^\\s+", "", star_string)
+
+
+def scrape_night(driver, night: date, coords: str, site: dict, export: str) -> str:
+    """
+    Downloads a staralt plot from the staralt website. The driver must already be on that page for this function to
+    work.
+    :param driver: The Chrome driver
+    :param night: The date that the night begins
+    :param coords: The coordinate list of the stars, as made by staralt_coords
+    :param site: The site parameters (latitude, longitude, elevation and ut_offset)
+    :param export: The folder that the plot is downloaded to
+    :return: The path of the downloaded plot
+    """
+    # Night date (date that the night begins)
+    day_element = Select(driver.find_element(By.NAME, "form[day]"))
+    day_element.select_by_visible_text(night.strftime("%d"))  # 2 digit
+
+    month_element = Select(driver.find_element(By.NAME, "form[month]"))
+    month_element.select_by_visible_text(night.strftime("%B"))  # Full month name
+
+    year_element = Select(driver.find_element(By.NAME, "form[year]"))
+    year_element.select_by_visible_text(night.strftime("%Y"))  # Full year
+
+    # Observatory location
+    obs_element = driver.find_element(By.NAME, "form[sitecoord]")
+    obs_element.clear()
+    obs_element.send_keys(f"{site['longitude']} {site['latitude']} {site['elevation']} {site['ut_offset']}")
+
+    # Star coordinates
+    coords_element = driver.find_element(By.NAME, "form[coordlist]")
+    coords_element.clear()
+    coords_element.send_keys(coords)
+
+    # Export options
+    format_element = Select(driver.find_element(By.NAME, "form[format]"))
+    format_element.select_by_visible_text("GIF [attachment]")
+
+    # Retrieve
+    driver.find_element(By.NAME, "submit").click()
+
+    # Rename file
+    file_path = f"{export}/image.gif"
+
+    while not os.path.exists(file_path):
+        time.sleep(1)
+
+    path = f"{export}/{night}.gif"
+    os.rename(file_path, path)
+
+    return path
+
+
+def scrape_nights(groups: list[tuple[date, pd.DataFrame]], site: dict, export: str, url: str) -> list[str]:
+    """
+    Downloads the staralt plot of each night through a Chrome browser. This is the 'selenium' plot backend.
+    :param groups: The date of each night, and the star_name, ra and dec of each star to plot on it
+    :param site: The site parameters (latitude, longitude, elevation and ut_offset)
+    :param export: The folder that the plots are downloaded to
+    :param url: The address of the staralt website
+    :return: The paths of the downloaded plots
+    """
+    opts = Options()
+    opts.add_experimental_option("prefs", {
+        "download.default_directory": abspath(export),
+        "download.prompt_for_download": False
+    })
+    opts.add_argument("--no-sandbox")
+
+    driver = webdriver.Chrome(options=opts, service=Service(ChromeDriverManager().install()))
+
+    try:
+        driver.get(url)
+        return [scrape_night(driver, night, staralt_coords(stars), site, export) for night, stars in groups]
+    finally:
+        driver.close()
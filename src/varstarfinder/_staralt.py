@@ -0,0 +1,224 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import ephem
+import numpy as np
+import pandas as pd
+
+from ._ephemeris import JD_UNIX_EPOCH
+
+
+def night_times(night: date, ut_offset: float, step: int = 5) -> pd.DatetimeIndex:
+    """
+    Builds the time grid for a night, running from local midday on the given date to local midday the next day.
+    :param night: The date that the night begins
+    :param ut_offset: The offset of local time from UT, in hours
+    :param step: The spacing of the grid in minutes
+    :return: The grid times in UT
+    """
+    start = datetime.combine(night, datetime.min.time()) + timedelta(hours=12 - ut_offset)
+    return pd.date_range(start, start + timedelta(days=1), freq=f"{step}min")
+
+
+def local_sidereal_times(times: pd.DatetimeIndex, longitude: float) -> np.ndarray:
+    """
+    Computes the local sidereal time at each of the given times.
+    :param times: The times in UT
+    :param longitude: The longitude of the site in degrees (east positive)
+    :return: The local sidereal times in radians
+    """
+    jd = (times - pd.Timestamp(0)).total_seconds().to_numpy() / 86400 + JD_UNIX_EPOCH
+    gmst = 280.46061837 + 360.98564736629 * (jd - 2451545.0)
+
+    return np.radians((gmst + longitude) % 360)
+
+
+def altitudes(ra: np.ndarray, dec: np.ndarray, lst: np.ndarray, latitude: float) -> np.ndarray:
+    """
+    Computes the altitude of each star at each sidereal time.
+    :param ra: The right ascension of each star in degrees
+    :param dec: The declination of each star in degrees
+    :param lst: The local sidereal times in radians
+    :param latitude: The latitude of the site in degrees
+    :return: An array of altitudes in degrees, with one row per star and one column per time
+    """
+    lat = np.radians(latitude)
+    dec = np.radians(np.asarray(dec, dtype=float))[:, np.newaxis]
+    hour_angle = lst[np.newaxis, :] - np.radians(np.asarray(ra, dtype=float))[:, np.newaxis]
+
+    sin_alt = np.sin(lat) * np.sin(dec) + np.cos(lat) * np.cos(dec) * np.cos(hour_angle)
+
+    return np.degrees(np.arcsin(np.clip(sin_alt, -1, 1)))
+
+
+def airmass(altitude: np.ndarray) -> np.ndarray:
+    """
+    Computes the airmass at each altitude, using the Kasten and Young (1989) approximation.
+    :param altitude: Altitudes in degrees
+    :return: The airmass, or NaN wherever the altitude is below the horizon
+    """
+    with np.errstate(invalid="ignore"):
+        result = 1 / (np.sin(np.radians(altitude)) + 0.50572 * (altitude + 6.07995) ** -1.6364)
+
+    return np.where(altitude > 0, result, np.nan)
+
+
+def sun_moon_altitudes(times: pd.DatetimeIndex, site: dict) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the altitudes of the Sun and Moon at each of the given times.
+    :param times: The times in UT
+    :param site: The site parameters (latitude, longitude and elevation)
+    :return: The Sun and Moon altitudes in degrees
+    """
+    observer = ephem.Observer()
+    observer.lat = str(site['latitude'])
+    observer.lon = str(site['longitude'])
+    observer.elevation = site['elevation']
+
+    sun, moon = ephem.Sun(), ephem.Moon()
+    sun_alt, moon_alt = np.empty(len(times)), np.empty(len(times))
+
+    for i, t in enumerate(times):
+        observer.date = ephem.Date(t.to_pydatetime())
+        sun.compute(observer)
+        moon.compute(observer)
+
+        sun_alt[i], moon_alt[i] = sun.alt, moon.alt
+
+    return np.degrees(sun_alt), np.degrees(moon_alt)
+
+
+def dark_window(night: date, site: dict, sun_altitude: float = -18) -> tuple[datetime, datetime] | None:
+    """
+    Finds the dark time of a night, while the Sun is below the given altitude.
+    :param night: The date that the night begins
+    :param site: The site parameters (latitude, longitude, elevation and ut_offset)
+    :param sun_altitude: The altitude of the Sun that dark time begins and ends at, in degrees (-18 for astronomical
+        twilight)
+    :return: The start and end of dark time in local time, or None if the Sun doesn't get that low
+    """
+    observer = ephem.Observer()
+    observer.lat = str(site['latitude'])
+    observer.lon = str(site['longitude'])
+    observer.elevation = site['elevation']
+    observer.horizon = str(sun_altitude)
+
+    # Search from local midday, as in night_times
+    midday = datetime.combine(night, datetime.min.time()) + timedelta(hours=12 - site['ut_offset'])
+    observer.date = ephem.Date(midday)
+    sun = ephem.Sun()
+
+    try:
+        start = observer.next_setting(sun, use_center=True).datetime()
+        end = observer.next_rising(sun, start=start, use_center=True).datetime()
+    except ephem.AlwaysUpError:
+        return None
+    except ephem.NeverUpError:
+        start, end = midday, midday + timedelta(days=1)
+
+    # Dark time running past the next midday belongs to the next night too, so is cut off there
+    end = min(end, midday + timedelta(days=1))
+
+    offset = timedelta(hours=site['ut_offset'])
+    return start + offset, end + offset
+
+
+def compute_night(night: date, stars: pd.DataFrame, site: dict, step: int = 5) -> pd.DataFrame:
+    """
+    Computes the altitude and airmass of each star over a night, along with the Sun and Moon altitudes.
+    :param night: The date that the night begins
+    :param stars: The stars to compute, with the columns star_name, ra and dec (in degrees)
+    :param site: The site parameters (latitude, longitude, elevation and ut_offset)
+    :param step: The spacing of the time grid in minutes
+    :return: A long table with one row per star per time, with times in local time
+    """
+    times = night_times(night, site['ut_offset'], step)
+
+    star_alt = altitudes(stars['ra'].to_numpy(), stars['dec'].to_numpy(),
+                         local_sidereal_times(times, site['longitude']), site['latitude'])
+    sun_alt, moon_alt = sun_moon_altitudes(times, site)
+
+    n_stars, n_times = star_alt.shape
+
+    return pd.DataFrame({
+        "night": night,
+        "time": np.tile(times + timedelta(hours=site['ut_offset']), n_stars),
+        "star_name": np.repeat(stars['star_name'].to_numpy(), n_times),
+        "altitude": star_alt.ravel(),
+        "airmass": airmass(star_alt).ravel(),
+        "sun_altitude": np.tile(sun_alt, n_stars),
+        "moon_altitude": np.tile(moon_alt, n_stars)
+    })
+
+
+def render_night(night: date, stars: pd.DataFrame, site: dict, export: str, step: int = 5,
+                 file_format: str = "png") -> str:
+    """
+    Renders a staralt style plot of the stars' altitudes over a night. Designed to be run in a worker process.
+    :param night: The date that the night begins
+    :param stars: The stars to plot, with the columns star_name, ra and dec (in degrees)
+    :param site: The site parameters (latitude, longitude, elevation and ut_offset)
+    :param export: The folder that the plot is saved to
+    :param step: The spacing of the time grid in minutes
+    :param file_format: The image format of the plot
+    :return: The path of the saved plot
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    night_data = compute_night(night, stars, site, step)
+    first_star = night_data[night_data['star_name'] == night_data['star_name'].iloc[0]]
+    times, sun_alt = first_star['time'], first_star['sun_altitude'].to_numpy()
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    # Shade daytime and twilight
+    ax.fill_between(times, 0, 90, where=sun_alt > 0, color="0.6", step="mid")
+    ax.fill_between(times, 0, 90, where=(sun_alt <= 0) & (sun_alt > -18), color="0.85", step="mid")
+
+    for star_name, star_data in night_data.groupby('star_name', sort=False):
+        ax.plot(star_data['time'], star_data['altitude'], label=star_name)
+
+    ax.plot(times, first_star['moon_altitude'], "k--", label="Moon")
+
+    ax.set_ylim(0, 90)
+    ax.set_xlim(times.iloc[0], times.iloc[-1])
+    ax.set_xlabel("Local time")
+    ax.set_ylabel("Altitude (degrees)")
+    ax.set_title(f"Night of {night}")
+    ax.legend(loc="upper right", fontsize="small", ncol=2)
+    ax.grid(alpha=0.3)
+
+    # Label the altitude axis with airmass on the right hand side
+    airmass_ax = ax.twinx()
+    airmass_ax.set_ylim(ax.get_ylim())
+    ticks = [15, 20, 30, 42, 60, 90]
+    airmass_ax.set_yticks(ticks, [f"{a:.2f}" for a in airmass(np.array(ticks, dtype=float))])
+    airmass_ax.set_ylabel("Airmass")
+
+    path = f"{export}/{night}.{file_format}"
+    fig.savefig(path, bbox_inches="tight")
+    plt.close(fig)
+
+    return path
+
+
+def render_nights(groups: list[tuple[date, pd.DataFrame]], site: dict, export: str, step: int = 5,
+                  file_format: str = "png", workers: int = None) -> list[str]:
+    """
+    Renders a staralt style plot for each night, in parallel across processes. This is the 'matplotlib' plot backend.
+    :param groups: The date of each night, and the star_name, ra and dec of each star to plot on it
+    :param site: The site parameters (latitude, longitude, elevation and ut_offset)
+    :param export: The folder that the plots are saved to
+    :param step: The spacing of the time grid in minutes
+    :param file_format: The image format of the plots
+    :param workers: The number of processes used for rendering (defaults to the number of CPUs)
+    :return: The paths of the saved plots
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(render_night, night, stars, site, export, step, file_format)
+                   for night, stars in groups]
+
+        return [future.result() for future in futures]
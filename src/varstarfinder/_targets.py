@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Iterator
+
+import pandas as pd
+
+from .config import Config
+
+if TYPE_CHECKING:
+    from ._http import HttpClient
+
+
+# Keys that a paginated response may use to report how many pages there are in total
+PAGE_COUNT_KEYS = ("pages", "total_pages", "page_count")
+
+
+class TargetClient:
+    def __init__(self, config: Config, client: HttpClient, chunk_size: int = 1000):
+        """
+        A client for the AAVSO Target Tool API. Requests share the pooled, retrying HttpClient, and results are
+        normalized a chunk at a time as they arrive.
+        :param config: A Config object containing the API key and request parameters
+        :param client: The HttpClient used for the requests
+        :param chunk_size: The number of targets normalized at a time
+        """
+        self._config = config
+        self._client = client
+        self._chunk_size = chunk_size
+
+    def _get_page(self, page: int = None) -> dict:
+        params = dict(self._config.params)
+        if page is not None:
+            params['page'] = page
+
+        content = self._client.get(self._config.targets_url, params=params, auth=(self._config.API_KEY, "api_token"))
+
+        return json.loads(content)
+
+    @staticmethod
+    def _page_count(response: dict) -> int:
+        for key in PAGE_COUNT_KEYS:
+            if key in response:
+                return int(response[key])
+
+        if "total" in response and "per_page" in response:
+            return -(-int(response['total']) // int(response['per_page']))
+
+        return 1
+
+    def _normalize(self, targets_json: list[dict]) -> Iterator[pd.DataFrame]:
+        for i in range(0, len(targets_json), self._chunk_size):
+            yield pd.json_normalize(targets_json[i:i + self._chunk_size])
+
+    def iter_targets(self) -> Iterator[pd.DataFrame]:
+        """
+        Requests the targets, yielding them in normalized chunks. If the API reports that the results are split over
+        several pages, the remaining pages are fetched concurrently and yielded in page order.
+        :return: An iterator of target DataFrames
+        """
+        first = self._get_page()
+        n_pages = self._page_count(first)
+
+        yield from self._normalize(first['targets'])
+        del first
+
+        for response in self._client.imap(self._get_page, range(2, n_pages + 1)):
+            yield from self._normalize(response['targets'])
+
+    def fetch(self) -> pd.DataFrame:
+        """
+        Requests every target.
+        :return: The targets dataset
+        """
+        chunks = list(self.iter_targets())
+
+        return pd.concat(chunks, ignore_index=True) if len(chunks) > 0 else pd.DataFrame()
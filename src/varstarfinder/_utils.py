@@ -4,73 +4,104 @@ import re
 import pandas as pd
 
 
-def in_range(val, value_range: list, date_format: str = None) -> bool:
+def in_range(values: pd.Series, value_range: list) -> pd.Series:
     """
-    Determines if a value lies within a given range [start, end] inclusive.
-    If val is a datetime value, please provide str value ranges and provide the date_format parameter.
+    Determines which numeric values lie within a given range [start, end] inclusive. Missing or non-numeric values
+    are never in range.
 
-    :param val: The variable to be checked
+    :param values: The column to be checked
     :param value_range: The bounding range (inclusive)
-    :param date_format: Formats for date or time ranges
-    :return:
+    :return: A boolean mask over values
     """
-    if val is None or pd.isna(val):
-        return False
+    if not pd.api.types.is_numeric_dtype(values):
+        values = pd.to_numeric(values, errors="coerce")
 
-    if isinstance(val, int) or isinstance(val, float):
-        return value_range[0] <= val <= value_range[1]
+    return values.between(value_range[0], value_range[1])
 
-    if isinstance(val, datetime) and date_format is not None:
-        start = datetime.strptime(value_range[0], date_format)
-        end = datetime.strptime(value_range[1], date_format)
 
-        if not re.match("%H", date_format):  # is a date range
-            return start <= val <= end
+def in_date_range(values: pd.Series, date_range: list[str, str], date_format: str = "%Y-%m-%d") -> pd.Series:
+    """
+    Determines which datetime values lie within a given range [start, end] inclusive. The bounds are parsed once,
+    so ranges given as dates are compared against midnight at the start of each day.
+
+    :param values: The datetime column to be checked
+    :param date_range: The bounding range (inclusive), as strings
+    :param date_format: The format of the range strings
+    :return: A boolean mask over values
+    """
+    start = datetime.strptime(date_range[0], date_format)
+    end = datetime.strptime(date_range[1], date_format)
+
+    return pd.to_datetime(values).between(start, end)
 
-        # is a time range
-        midnight = datetime.strptime("00:00", "%H:%M").time()
-        time_val = val.time()
-        start = start.time()
-        end = end.time()
 
-        # No looping over midnight
-        if start <= end <= midnight:
-            return start <= time_val <= end
+def in_time_range(values: pd.Series, time_range: list[str, str], time_format: str = "%H:%M") -> pd.Series:
+    """
+    Determines which datetime values have a time of day within a given range [start, end] inclusive. If the start is
+    later than the end, the range is taken to loop over midnight.
+
+    :param values: The datetime column to be checked
+    :param time_range: The bounding range (inclusive), as strings
+    :param time_format: The format of the range strings
+    :return: A boolean mask over values
+    """
+    midnight = datetime.strptime("00:00", "%H:%M")
+    start = datetime.strptime(time_range[0], time_format) - midnight
+    end = datetime.strptime(time_range[1], time_format) - midnight
+
+    values = pd.to_datetime(values)
+    time_of_day = values - values.dt.normalize()
 
-        # Range loops over midnight
-        return (end <= start <= time_val) or (time_val <= end <= start)
+    # No looping over midnight
+    if start <= end:
+        return (time_of_day >= start) & (time_of_day <= end)
 
-    return False
+    # Range loops over midnight
+    return (time_of_day >= start) | (time_of_day <= end)
 
 
-def convert_to_date(date: str) -> datetime | None:
-    if isinstance(date, float):
-        return None
+# These should be the only date formats seen in the datasets
+DATE_FORMATS = [
+    (re.compile(r"^[0-9]{2} [A-Za-z]{3} [0-9]{4} [0-9]{2}:[0-9]{2}$"), "%d %b %Y %H:%M"),
+    (re.compile(r"^[0-9]{2} [A-Za-z]{3} [0-9]{4} [0-9]{2}:[0-9]{2}:[0-9]{2}$"), "%d %b %Y %H:%M:%S"),
+    (re.compile(r"^[0-9]{2} [A-Za-z]{3} [0-9]{4}$"), "%d %b %Y"),
+    (re.compile(r"^[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}$"), "%Y-%m-%d %H:%M"),
+    (re.compile(r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$"), "%Y-%m-%d"),
+    (re.compile(r"^[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}$"), "%Y-%m-%d %H:%M:%S")
+]
 
-    # These should be the only date formats seen in the datasets
-    if re.search(r"^[0-9]{2} [A-Za-z]{3} [0-9]{4} [0-9]{2}:[0-9]{2}$", date):
-        date = datetime.strptime(date, '%d %b %Y %H:%M').strftime("%Y-%m-%d %H:%M")
-    elif re.search(r"^[0-9]{2} [A-Za-z]{3} [0-9]{4} [0-9]{2}:[0-9]{2}:[0-9]{2}$", date):
-        date = datetime.strptime(date, '%d %b %Y %H:%M:%S').strftime("%Y-%m-%d %H:%M:%S")
-    elif re.search(r"^[0-9]{2} [A-Za-z]{3} [0-9]{4}$", date):
-        date = datetime.strptime(date, '%d %b %Y').strftime("%Y-%m-%d")
-    elif re.search(r"^[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}$", date):
-        date = datetime.strptime(date, "%Y-%m-%d %H:%M")
-    elif re.search(r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$", date):
-        date = datetime.strptime(date, "%Y-%m-%d")
-    elif re.search(r"^[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}$", date):
-        date = datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
-    else:
-        raise ValueError(f"Invalid date format for {date}")
 
-    return date
+def detect_date_format(date: str) -> str:
+    """
+    Finds the format of a date string, out of the formats used by the datasets.
+    :param date: A date string
+    :return: The strptime format of the date
+    """
+    for pattern, date_format in DATE_FORMATS:
+        if pattern.search(date):
+            return date_format
+
+    raise ValueError(f"Invalid date format for {date}")
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """
+    Converts a column of date strings into a datetime64 column. The format is detected once from the first value and
+    then parsed in bulk, only re-detecting for any values that didn't match it. Missing values become NaT.
+    :param values: The column of date strings
+    :return: The parsed datetime64 column
+    """
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    remaining = values[values.notna()].astype(str)
 
+    while len(remaining) > 0:
+        date_format = detect_date_format(remaining.iloc[0])
+        converted = pd.to_datetime(remaining, format=date_format, errors="coerce")
 
-def offset_time(t: datetime, ut_offset: int) -> datetime | None:
-    if t is None or isinstance(t, float):
-        return None
+        if pd.isna(converted.iloc[0]):
+            raise ValueError(f"Invalid date format for {remaining.iloc[0]}")
 
-    if isinstance(t, str):
-        t = convert_to_date(t)
+        parsed[converted.index] = converted
+        remaining = remaining[converted.isna()]
 
-    return t + timedelta(hours=ut_offset)
+    return parsed
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from ._export import check_export_path
+from .config import Config
+from .vsfframe import VSFFrame
+
+
+def _request_key(config: Config) -> str:
+    """
+    Identifies the target request a Config makes, so that sites making the same request can share it
+    """
+    return json.dumps([config.API_KEY, config.targets_url, sorted(config.params.items())], default=str)
+
+
+def _site_window(configs: list[Config], date_range: list[str, str] | None) -> tuple[datetime, datetime] | None:
+    """
+    Finds the UT bounds covering a local date range at every site
+    """
+    if date_range is None:
+        return None
+
+    start = datetime.strptime(date_range[0], "%Y-%m-%d")
+    end = datetime.strptime(date_range[1], "%Y-%m-%d")
+    offsets = [timedelta(hours=config.ut_offset) for config in configs]
+
+    return start - max(offsets), end - min(offsets)
+
+
+def plan_sites(sites: dict[str, Config] | list[Config], star_names: list[str] = None,
+               dec_range: list[float, float] = None, ra_range: list[float, float] = None,
+               date_range: list[str, str] = None, time_range: list[str, str] = None,
+               transit_range: list[float, float] = None, workers: int = None, export: str = None) -> pd.DataFrame:
+    """
+    Runs the targets and ephemeris pipeline for several observatories at once. Targets are requested once for each
+    distinct set of API parameters, and every star's ephemeris is scraped once no matter how many sites it appears
+    at. Each site's UT offset and filters are then applied in parallel.
+
+    :param sites: The Config of each site, keyed by site name (or a list, named by position)
+    :param star_names: A list of stars to be targeted, as in filter_targets
+    :param dec_range: A declination range (inclusive), as in filter_targets
+    :param ra_range: A right ascension range (inclusive), as in filter_targets
+    :param date_range: A local date range (inclusive) based on the mid-transit date, as in filter_ephemeris
+    :param time_range: A local time range (inclusive) based on the mid-transit time, as in filter_ephemeris
+    :param transit_range: A length of time for the transit to occur, in hours (inclusive), as in filter_ephemeris
+    :param workers: The number of sites processed at once (defaults to one thread per site)
+    :param export: A path to export the dataset to, as an xlsx, csv, parquet or feather file
+    :return: The filtered ephemeris data of every site in long format, with the site name in the first column
+    """
+    if not isinstance(sites, dict):
+        sites = {str(i): config for i, config in enumerate(sites)}
+
+    if len(sites) == 0:
+        raise ValueError("At least one site is required")
+
+    check_export_path(export)
+
+    # Request the targets once per distinct request
+    targets = {}
+    for config in sites.values():
+        key = _request_key(config)
+        if key not in targets:
+            frame = VSFFrame(config).request_targets().filter_targets(star_names, dec_range, ra_range)
+            targets[key] = frame._with_ephemeris_urls()
+
+    # Scrape the ephemeris of every star once, in UT, using the fetching options of the first site
+    first = VSFFrame(next(iter(sites.values())))
+    stars = pd.concat(targets.values())[['star_name', 'ephemeris_url']].drop_duplicates('star_name')
+    ephemeris_data = first._fetch_ephemeris(stars['star_name'], stars['ephemeris_url'],
+                                            _site_window(list(sites.values()), date_range))
+
+    def plan_site(config: Config) -> pd.DataFrame:
+        frame = VSFFrame(config, {"request_targets": True, "scrape_ephemeris": False, "scrape_staralt": False})
+        site_targets = targets[_request_key(config)]
+
+        site_ephemeris = ephemeris_data[ephemeris_data['star_name'].isin(site_targets['star_name'])].copy()
+
+        return frame._attach_ephemeris(site_targets, site_ephemeris) \
+            .filter_ephemeris(date_range, time_range, transit_range).data
+
+    with ThreadPoolExecutor(max_workers=workers or len(sites)) as executor:
+        plans = list(executor.map(plan_site, sites.values()))
+
+    plan = pd.concat(plans, keys=list(sites.keys()), names=["site", None]).reset_index(level="site") \
+        .reset_index(drop=True)
+
+    if export is not None:
+        first._export(plan, export)
+
+    return plan
@@ -1,5 +1,19 @@
+from ._cache import ResponseCache
+from ._instrument import Instrumentation
+
+
+TARGETS_URL = "https://filtergraph.com/aavso/api/v1/targets"
+VSX_URL = "https://www.aavso.org/vsx"
+STARALT_URL = "http://catserver.ing.iac.es/staralt/"
+
+
 class Config:
-    def __init__(self, api_key: str, latitude: float, longitude: float, elevation: float, ut_offset: int, **kwargs):
+    def __init__(self, api_key: str, latitude: float, longitude: float, elevation: float, ut_offset: int,
+                 workers: int = 1, rate_limit: float = None, retries: int = 3, backoff: float = 1.0,
+                 timeout: float = 30, cache_dir: str = None, cache_ttl: float = 86400, cache_size: int = None,
+                 offline: bool = False, parser: str = "fast", fetcher: str = "requests",
+                 background_export: bool = False, targets_url: str = TARGETS_URL, vsx_url: str = VSX_URL,
+                 staralt_url: str = STARALT_URL, **kwargs):
         """
         Holds all configurations for the API queries and positional information.
         See the 'GET targets' section of https://filtergraph.com/aavso/api for other parameter input options.
@@ -9,6 +23,24 @@ class Config:
         :param longitude: angular distance east (+) or west (-) of the earth's equator, expressed as a float
         :param elevation: elevation in metres
         :param ut_offset:
+        :param workers: the number of concurrent requests used when scraping the ephemeris data
+        :param rate_limit: the maximum number of requests per second sent to a single host (None for no limit)
+        :param retries: the number of times a failed request is retried before giving up
+        :param backoff: the initial delay between retries in seconds, doubled after each attempt
+        :param timeout: the timeout for each request in seconds
+        :param cache_dir: a folder to cache raw responses in, so repeated runs don't refetch them (None to disable)
+        :param cache_ttl: the number of seconds a cached response stays valid for (None to never expire)
+        :param cache_size: the maximum size of the cache in bytes, evicting the least recently used responses first
+        :param offline: serve responses from the cache only, without making any requests
+        :param parser: the HTML parser used for ephemeris pages - 'fast' extracts the table cells directly, falling back
+            to 'bs4' (BeautifulSoup) for pages it can't handle. Other parse backends can be added with register_backend.
+        :param fetcher: the fetch backend used for requests - 'requests' by default, with others added through
+            register_backend
+        :param background_export: write exported files on a background thread, so the pipeline keeps running while
+            they are written. Use VSFFrame.wait_exports to wait for them to finish.
+        :param targets_url: the endpoint of the AAVSO Target Tool API
+        :param vsx_url: the base URL that ephemeris pages are fetched from, in place of the VSX website
+        :param staralt_url: the staralt page used by scrape_staralt_plots
         :param kwargs: Other parameters for the API request to the AAVSO Target Tool database
         """
         self.API_KEY = api_key
@@ -17,6 +49,25 @@ class Config:
         self.elevation = elevation
         self.ut_offset = ut_offset
 
+        self.workers = workers
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.offline = offline
+        self.parser = parser
+        self.fetcher = fetcher
+        self.background_export = background_export
+
+        self.targets_url = targets_url
+        self.vsx_url = vsx_url
+        self.staralt_url = staralt_url
+
+        # Hooks registered through VSFFrame.register_hook
+        self.instrumentation = Instrumentation()
+        self.cache = ResponseCache(cache_dir, cache_ttl, cache_size) if cache_dir is not None else None
+
         self._extract_params(latitude, longitude, **kwargs)
 
     def _extract_params(self, latitude: float, longitude: float, **kwargs):
@@ -8,3 +8,11 @@ class OrderError(Exception):
         super().__init__(f"Messages are called out of order! The required previous function {missing_func} has not been"
                          f" used. The correct order should be {func_flags}")
 
+
+class CacheMissError(Exception):
+    def __init__(self, url: str):
+        """
+        Raised in offline mode when a requested response has not been cached
+        :param url: The URL that was requested
+        """
+        super().__init__(f"No cached response is available for {url}, and requests cannot be made in offline mode.")
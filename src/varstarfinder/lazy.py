@@ -0,0 +1,284 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import pandas as pd
+
+from ._export import check_export_path
+from .config import Config
+from .store import CatalogueStore
+from .vsfframe import VSFFrame
+
+
+# Steps that filter_targets can be moved ahead of, since they don't change the target columns it filters on
+TARGET_FILTER_PASSTHROUGH = ("scrape_ephemeris", "compute_ephemeris", "filter_ephemeris")
+EPHEMERIS_STAGES = ("scrape_ephemeris", "compute_ephemeris")
+
+
+@dataclass
+class _Step:
+    name: str
+    kwargs: dict = field(default_factory=dict)
+
+    @property
+    def export(self) -> str | None:
+        return self.kwargs.get('export')
+
+    @property
+    def store(self) -> str | CatalogueStore | None:
+        return self.kwargs.get('store')
+
+    def __str__(self) -> str:
+        args = [f"{key}={f'<{len(value)} rows>' if isinstance(value, pd.DataFrame) else repr(value)}"
+                for key, value in self.kwargs.items() if value is not None]
+        return f"{self.name}({', '.join(args)})"
+
+
+def _intersect_ranges(a: list | None, b: list | None) -> list | None:
+    if a is None or b is None:
+        return a if b is None else b
+
+    return [max(a[0], b[0]), min(a[1], b[1])]
+
+
+def _intersect_dates(a: list[str, str] | None, b: list[str, str] | None) -> list[str, str] | None:
+    # Dates are compared once parsed, since they don't need zero padding and so can't be compared as strings
+    if a is None or b is None:
+        return a if b is None else b
+
+    a, b = ([datetime.strptime(date, "%Y-%m-%d") for date in pair] for pair in (a, b))
+    return [date.strftime("%Y-%m-%d") for date in _intersect_ranges(a, b)]
+
+
+def _merge_filters(first: _Step, second: _Step) -> _Step | None:
+    """
+    Combines two consecutive filters of the same kind into one, if their conditions can be combined
+    :return: The combined filter, or None if they need to be kept separate
+    """
+    if first.export is not None:
+        return None
+
+    a, b = first.kwargs, second.kwargs
+
+    if first.name == "filter_targets":
+        star_names = a['star_names'] if b['star_names'] is None else b['star_names']
+        if a['star_names'] is not None and b['star_names'] is not None:
+            star_names = [name for name in a['star_names'] if name in set(b['star_names'])]
+
+        return _Step("filter_targets", {
+            "star_names": star_names,
+            "dec_range": _intersect_ranges(a['dec_range'], b['dec_range']),
+            "ra_range": _intersect_ranges(a['ra_range'], b['ra_range']),
+            "export": b['export']
+        })
+
+    # Time ranges can loop over midnight, so only identical ones can be combined
+    if a['time_range'] is not None and b['time_range'] is not None and a['time_range'] != b['time_range']:
+        return None
+
+    return _Step("filter_ephemeris", {
+        "date_range": _intersect_dates(a['date_range'], b['date_range']),
+        "time_range": a['time_range'] if b['time_range'] is None else b['time_range'],
+        "transit_range": _intersect_ranges(a['transit_range'], b['transit_range']),
+        "export": b['export']
+    })
+
+
+class LazyVSFFrame:
+    def __init__(self, config: Config, source: VSFFrame = None, steps: list[_Step] = None):
+        """
+        A lazy version of VSFFrame, which records the chain of calls and only runs them on collect. Before running,
+        the plan is optimised so that filters are applied as early as possible, avoiding unnecessary fetches, copies
+        and columns.
+        :param config: A Config object containing all the relevant observing options
+        :param source: An existing VSFFrame to start the plan from
+        :param steps: The steps recorded so far - not to be used manually.
+        """
+        self._config = config
+        self._source = source
+        self._steps = steps if steps is not None else []
+
+    def _then(self, name: str, **kwargs) -> LazyVSFFrame:
+        check_export_path(kwargs.get('export'))
+        return LazyVSFFrame(self._config, self._source, self._steps + [_Step(name, kwargs)])
+
+    def request_targets(self, export: str = None) -> LazyVSFFrame:
+        return self._then("request_targets", export=export)
+
+    def filter_targets(self, star_names: list[str] = None, dec_range: list[float, float] = None,
+                       ra_range: list[float, float] = None, export: str = None) -> LazyVSFFrame:
+        return self._then("filter_targets", star_names=star_names, dec_range=dec_range, ra_range=ra_range,
+                          export=export)
+
+    def scrape_ephemeris(self, date_range: list[str, str] = None, checkpoint: str = None,
+                         export: str = None, store: str | CatalogueStore = None) -> LazyVSFFrame:
+        return self._then("scrape_ephemeris", date_range=date_range, checkpoint=checkpoint, export=export,
+                          store=store)
+
+    def compute_ephemeris(self, date_range: list[str, str], elements: pd.DataFrame = None,
+                          export: str = None) -> LazyVSFFrame:
+        return self._then("compute_ephemeris", date_range=date_range, elements=elements, export=export)
+
+    def filter_ephemeris(self, date_range: list[str, str] = None, time_range: list[str, str] = None,
+                         transit_range: list[float, float] = None, export: str = None) -> LazyVSFFrame:
+        return self._then("filter_ephemeris", date_range=date_range, time_range=time_range,
+                          transit_range=transit_range, export=export)
+
+    def select(self, columns: list[str]) -> LazyVSFFrame:
+        """
+        Keeps only the given columns in the collected dataset. Any target columns that aren't needed are dropped
+        before the ephemeris data is joined on.
+        :param columns: The columns to keep
+        :return: The lazy dataset
+        """
+        return self._then("select", columns=list(columns))
+
+    def optimize(self) -> list[_Step]:
+        """
+        Rewrites the recorded steps into an equivalent plan that does less work. Steps with an export are never moved
+        past, and target filters aren't moved past a catalogue store, so every exported file and store matches what the
+        eager VSFFrame would have written.
+        :return: The optimised steps
+        """
+        steps = self._push_target_filters(self._steps)
+        steps = self._merge_adjacent_filters(steps)
+        steps = self._push_date_windows(steps)
+
+        return self._prune_columns(steps)
+
+    @staticmethod
+    def _push_target_filters(steps: list[_Step]) -> list[_Step]:
+        # Target filters only use target columns, so they can run before the ephemeris data is fetched
+        result = []
+        for step in steps:
+            i = len(result)
+
+            if step.name == "filter_targets":
+                # A catalogue store saves every target it's given, so filters aren't moved past one either
+                while i > 0 and result[i - 1].name in TARGET_FILTER_PASSTHROUGH and result[i - 1].export is None \
+                        and result[i - 1].store is None:
+                    i -= 1
+
+                # An exporting filter stays where it is so the file matches, with a copy pushed down to do the work
+                if step.export is not None and i < len(result):
+                    result.insert(i, _Step(step.name, {**step.kwargs, "export": None}))
+                    result.append(step)
+                    continue
+
+            result.insert(i, step)
+
+        return result
+
+    @staticmethod
+    def _merge_adjacent_filters(steps: list[_Step]) -> list[_Step]:
+        # Consecutive filters are combined into one mask, so the data is only indexed once
+        result = []
+        for step in steps:
+            merged = None
+            if len(result) > 0 and step.name in ("filter_targets", "filter_ephemeris") and result[-1].name == step.name:
+                merged = _merge_filters(result[-1], step)
+
+            if merged is not None:
+                result[-1] = merged
+            else:
+                result.append(step)
+
+        return result
+
+    @staticmethod
+    def _push_date_windows(steps: list[_Step]) -> list[_Step]:
+        # The date ranges of later ephemeris filters bound which eclipses the ephemeris stage needs to keep
+        result = list(steps)
+        for i, step in enumerate(result):
+            if step.name not in EPHEMERIS_STAGES or step.export is not None:
+                continue
+
+            date_range = step.kwargs['date_range']
+            for later in result[i + 1:]:
+                if later.name != "filter_ephemeris":
+                    break
+
+                date_range = _intersect_dates(date_range, later.kwargs['date_range'])
+
+                if later.export is not None:
+                    break
+
+            result[i] = _Step(step.name, {**step.kwargs, "date_range": date_range})
+
+        return result
+
+    @staticmethod
+    def _prune_columns(steps: list[_Step]) -> list[_Step]:
+        # Drop unselected target columns before they're copied onto every eclipse row
+        if len(steps) == 0 or steps[-1].name != "select":
+            return steps
+
+        stages = [i for i, step in enumerate(steps) if step.name in EPHEMERIS_STAGES]
+        if len(stages) == 0 or any(step.export is not None for step in steps[stages[0]:]):
+            return steps
+
+        # A catalogue store keeps every targets column
+        if steps[stages[0]].store is not None:
+            return steps
+
+        needed = set(steps[-1].kwargs['columns']) | {"star_name", "other_info"}
+        for step in steps[stages[0]:]:
+            if step.name == "compute_ephemeris":
+                needed |= {"epoch", "period", "duration"}
+            elif step.name == "filter_targets":
+                needed |= {"ra", "dec"}
+
+        return steps[:stages[0]] + [_Step("prune", {"columns": sorted(needed)})] + steps[stages[0]:]
+
+    def explain(self) -> str:
+        """
+        Describes the optimised plan, including what will be fetched over the network.
+        :return: A description of each step in the plan
+        """
+        lines = ["Recorded plan:"] + [f"  {i + 1}. {step}" for i, step in enumerate(self._steps)]
+        lines.append("Optimised plan:")
+
+        targets = self._source.data if self._source is not None else None
+        for i, step in enumerate(self.optimize()):
+            note = ""
+
+            if step.name == "request_targets":
+                note = "fetches the targets list from the AAVSO API"
+                targets = None
+            elif step.name == "filter_targets" and targets is not None:
+                targets = targets[VSFFrame._target_mask(targets, step.kwargs['star_names'], step.kwargs['dec_range'],
+                                                        step.kwargs['ra_range'])]
+            elif step.name in EPHEMERIS_STAGES:
+                count = "one VSX page per remaining target"
+                if targets is not None:
+                    urls = targets['other_info'].map(VSFFrame._extract_ephemeris_url)
+                    n_pages = urls.notna().sum()
+                    count = f"{n_pages} VSX page{'' if n_pages == 1 else 's'}"
+
+                if step.name == "scrape_ephemeris":
+                    note = f"fetches {count}"
+                    if step.store is not None:
+                        note = f"fetches up to {count}, skipping stars that are up to date in the store"
+                else:
+                    note = f"computes eclipses locally, fetching up to {count} for stars without elements"
+
+            lines.append(f"  {i + 1}. {step}" + (f"  [{note}]" if note else ""))
+
+        return "\n".join(lines)
+
+    def collect(self) -> VSFFrame:
+        """
+        Optimises and runs the recorded plan.
+        :return: The resulting dataset
+        """
+        frame = self._source if self._source is not None else VSFFrame(self._config)
+
+        for step in self.optimize():
+            if step.name in ("select", "prune"):
+                columns = [c for c in frame.data.columns if c in step.kwargs['columns']] if step.name == "prune" \
+                    else step.kwargs['columns']
+                frame = VSFFrame(self._config, frame._func_flags, data=frame.data[columns])
+            else:
+                frame = getattr(frame, step.name)(**step.kwargs)
+
+        return frame
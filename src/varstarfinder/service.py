@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+
+from .config import Config
+from .store import CatalogueStore
+from .vsfframe import VSFFrame
+
+
+class _Snapshot:
+    def __init__(self, frame: VSFFrame, date_range: list[str, str]):
+        """
+        The targets and ephemeris data from one refresh. Snapshots are never modified, so queries can read them
+        without holding a lock.
+        """
+        self.frame = frame
+        self.data = frame.data
+        self.targets = frame._compact.targets
+        self.date_range = date_range
+        self.refreshed_at = time.time()
+
+        # Build the interval index up front, rather than on the first query
+        frame._eclipse_intervals()
+
+
+def _range(value: str) -> list[float, float]:
+    start, end = value.split(",")
+    return [float(start), float(end)]
+
+
+def _pair(value: str) -> list[str, str]:
+    start, end = value.split(",")
+    return [start, end]
+
+
+def _records(data: pd.DataFrame) -> bytes:
+    return data.to_json(orient="records", date_format="iso").encode()
+
+
+class PlannerService:
+    def __init__(self, config: Config, days: int = 30, refresh_interval: float = 3600,
+                 store: str | CatalogueStore = None, host: str = "127.0.0.1", port: int = 8080):
+        """
+        A local HTTP server that keeps the targets and ephemeris data in memory, answering queries against them
+        without any requests to AAVSO. The data is refreshed on a background thread, and queries keep being answered
+        from the previous data until a refresh completes. Every response is JSON:
+            GET  /targets    filter_targets-style query: star_names=A,B  dec_range=-90,0  ra_range=0,180
+            GET  /ephemeris  the targets filters, along with date_range=2022-09-19,2022-10-10  time_range=19:30,00:00
+                             and transit_range=0,6 as in filter_ephemeris
+            GET  /eclipses   query_eclipses-style query: start=2022-09-20T20:00  end=2022-09-20T23:00  how=overlap
+            GET  /status     when the data was last refreshed, and any error from the latest refresh
+            POST /refresh    starts a refresh straight away
+        :param config: A Config object containing all the relevant observing options
+        :param days: The number of days of eclipses to keep, starting from the local date of each refresh
+        :param refresh_interval: The time between refreshes, in seconds
+        :param store: A CatalogueStore (or the path of one) to refresh against, so only new or stale stars are scraped
+        :param host: The address to listen on
+        :param port: The port to listen on (0 picks a free one)
+        """
+        self.config = config
+        self.days = days
+        self.refresh_interval = refresh_interval
+        self.store = store
+
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.last_error = None
+
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._threads = []
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def snapshot(self) -> _Snapshot | None:
+        with self._lock:
+            return self._snapshot
+
+    def __enter__(self) -> PlannerService:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """
+        Starts serving and refreshing on background threads.
+        """
+        self._threads = [threading.Thread(target=self._server.serve_forever, daemon=True),
+                         threading.Thread(target=self._refresh_loop, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+        # shutdown waits for serve_forever to return, so would block if serving was never started
+        if self._threads:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        """
+        Serves until interrupted, for running the service on its own.
+        """
+        self.start()
+        try:
+            self._stop.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def refresh(self):
+        """
+        Fetches the targets and ephemeris data, replacing the current snapshot once complete. Failed refreshes leave
+        the current snapshot in place.
+        """
+        with self._refresh_lock:
+            today = (datetime.now(timezone.utc) + timedelta(hours=self.config.ut_offset)).date()
+            date_range = [str(today), str(today + timedelta(days=self.days))]
+
+            try:
+                frame = VSFFrame(self.config).request_targets() \
+                    .scrape_ephemeris(date_range=date_range, store=self.store)
+                snapshot = _Snapshot(frame, date_range)
+            except Exception as e:
+                self.last_error = repr(e)
+                return
+
+            self.last_error = None
+            with self._lock:
+                self._snapshot = snapshot
+
+    def request_refresh(self):
+        """
+        Wakes the refresh thread, so a refresh starts without waiting for the interval.
+        """
+        self._wake.set()
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            self.refresh()
+
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+
+    def query_targets(self, params: dict) -> pd.DataFrame:
+        snapshot = self.snapshot
+        return snapshot.targets[self._targets_mask(snapshot.targets, params)]
+
+    def query_ephemeris(self, params: dict) -> pd.DataFrame:
+        snapshot = self.snapshot
+        data = snapshot.data[self._targets_mask(snapshot.data, params)]
+
+        return data[VSFFrame._ephemeris_mask(data, _pair(params['date_range']) if 'date_range' in params else None,
+                                             _pair(params['time_range']) if 'time_range' in params else None,
+                                             _range(params['transit_range']) if 'transit_range' in params else None)]
+
+    def query_eclipses(self, params: dict) -> pd.DataFrame:
+        frame = self.snapshot.frame
+        return frame.query_eclipses(params['start'], params.get('end'), params.get('how', "overlap")).data
+
+    @staticmethod
+    def _targets_mask(data: pd.DataFrame, params: dict) -> pd.Series:
+        return VSFFrame._target_mask(data, params['star_names'].split(",") if 'star_names' in params else None,
+                                     _range(params['dec_range']) if 'dec_range' in params else None,
+                                     _range(params['ra_range']) if 'ra_range' in params else None)
+
+    def status(self) -> dict:
+        snapshot = self.snapshot
+        return {
+            "ready": snapshot is not None,
+            "refreshed_at": snapshot.refreshed_at if snapshot is not None else None,
+            "date_range": snapshot.date_range if snapshot is not None else None,
+            "rows": len(snapshot.data) if snapshot is not None else 0,
+            "refreshing": self._refresh_lock.locked(),
+            "last_error": self.last_error
+        }
+
+    def _handler(self):
+        service = self
+        queries = {
+            "/targets": self.query_targets,
+            "/ephemeris": self.query_ephemeris,
+            "/eclipses": self.query_eclipses
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status: int, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, status: int, value):
+                self._send(status, json.dumps(value).encode())
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = dict(parse_qsl(url.query))
+
+                if url.path == "/status":
+                    return self._send_json(200, service.status())
+
+                if url.path not in queries:
+                    return self._send_json(404, {"error": f"Unknown endpoint {url.path}"})
+
+                if service.snapshot is None:
+                    return self._send_json(503, {"error": "The first refresh hasn't completed yet"})
+
+                try:
+                    result = queries[url.path](params)
+                except (KeyError, ValueError) as e:
+                    return self._send_json(400, {"error": f"Invalid query: {e!r}"})
+
+                self._send(200, _records(result))
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+                if urlsplit(self.path).path != "/refresh":
+                    return self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+                service.request_refresh()
+                self._send_json(202, {"refreshing": True})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
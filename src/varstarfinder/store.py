@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from ._ephemeris import EPHEMERIS_COLUMNS
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS targets (
+    star_name TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    ephemeris_url TEXT,
+    fetched_at REAL NOT NULL,
+    ephemeris_fetched_at REAL,
+    covered_until INTEGER
+);
+CREATE TABLE IF NOT EXISTS eclipses (
+    star_name TEXT NOT NULL,
+    epoch,
+    start INTEGER,
+    mid INTEGER,
+    "end" INTEGER
+);
+CREATE INDEX IF NOT EXISTS eclipses_star_name ON eclipses (star_name);
+CREATE INDEX IF NOT EXISTS eclipses_mid ON eclipses (mid);
+"""
+
+TIME_COLUMNS = ["start", "mid", "end"]
+
+
+def _to_seconds(values: pd.Series) -> list[int | None]:
+    """
+    Converts datetimes into whole seconds since the Unix epoch, with None for missing values
+    """
+    values = pd.to_datetime(values)
+    seconds = (values - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+
+    return [None if pd.isna(x) else int(x) for x in seconds]
+
+
+class CatalogueStore:
+    def __init__(self, path: str, max_age: float = 30 * 86400):
+        """
+        A persistent SQLite catalogue of the targets, their ephemeris URLs and their eclipses (in UT), along with when
+        each was fetched. Refreshing against it only scrapes the stars that are new or stale.
+        :param path: The path of the database file
+        :param max_age: The age in seconds after which a star's ephemeris data is scraped again
+        """
+        self.path = path
+        self.max_age = max_age
+
+        # Connections are shared between threads, with the lock serialising access
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self) -> CatalogueStore:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def save_targets(self, targets: pd.DataFrame):
+        """
+        Adds or updates the targets. Stars whose ephemeris URL has changed are marked as stale, so they are scraped
+        again.
+        :param targets: The targets data, with an ephemeris_url column
+        """
+        records = json.loads(targets.drop(columns="ephemeris_url").to_json(orient="records", date_format="iso"))
+        urls = [None if pd.isna(url) else url for url in targets['ephemeris_url']]
+        now = time.time()
+
+        with self._lock, self._connection as connection:
+            connection.executemany("""
+                INSERT INTO targets (star_name, record, ephemeris_url, fetched_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (star_name) DO UPDATE SET
+                    record = excluded.record,
+                    fetched_at = excluded.fetched_at,
+                    ephemeris_fetched_at = CASE WHEN ephemeris_url IS excluded.ephemeris_url
+                        THEN ephemeris_fetched_at END,
+                    ephemeris_url = excluded.ephemeris_url
+            """, [(record['star_name'], json.dumps(record), url, now) for record, url in zip(records, urls)])
+
+    def stale_stars(self, star_names: pd.Series) -> list[str]:
+        """
+        Finds the stars whose ephemeris data needs to be scraped. These are stars never scraped, or scraped more than
+        max_age ago. A date range ending past a star's stored eclipses doesn't make it stale, since scraping the page
+        again would only reach further once time has moved on, which max_age covers.
+        :param star_names: The names of the stars to check
+        :return: The names of the stale stars, in the given order
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT star_name, ephemeris_url, ephemeris_fetched_at FROM targets") \
+                .fetchall()
+
+        stored = {star_name: row for star_name, *row in rows}
+        oldest = time.time() - self.max_age
+
+        def is_stale(star_name: str) -> bool:
+            if star_name not in stored:
+                return True
+
+            url, fetched_at = stored[star_name]
+            if url is None:
+                return False
+
+            return fetched_at is None or fetched_at < oldest
+
+        return [star_name for star_name in star_names if is_stale(star_name)]
+
+    def save_ephemeris(self, star_name: str, vals: pd.DataFrame | None):
+        """
+        Replaces the stored eclipses of a star.
+        :param star_name: The name of the star
+        :param vals: The ephemeris data of the star in UT, or None if it has none
+        """
+        rows = []
+        if vals is not None:
+            epochs = vals['epoch'].tolist() if 'epoch' in vals else [None] * len(vals)
+            times = [_to_seconds(vals[c]) for c in TIME_COLUMNS]
+            rows = [(star_name, epoch, *t) for epoch, *t in zip(epochs, *times)]
+
+        mids = [row[3] for row in rows if row[3] is not None]
+
+        with self._lock, self._connection as connection:
+            connection.execute("DELETE FROM eclipses WHERE star_name = ?", (star_name,))
+            connection.executemany('INSERT INTO eclipses (star_name, epoch, start, mid, "end") VALUES (?, ?, ?, ?, ?)',
+                                   rows)
+            connection.execute("UPDATE targets SET ephemeris_fetched_at = ?, covered_until = ? WHERE star_name = ?",
+                               (time.time(), max(mids) if mids else None, star_name))
+
+    def targets(self, star_names: list[str] = None) -> pd.DataFrame:
+        """
+        Reads the stored targets.
+        :param star_names: The stars to read (None for every star)
+        :return: The targets data, as returned by the API
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT star_name, record FROM targets ORDER BY rowid").fetchall()
+
+        if star_names is not None:
+            wanted = set(star_names)
+            rows = [row for row in rows if row[0] in wanted]
+
+        return pd.DataFrame.from_records([json.loads(record) for _, record in rows])
+
+    def eclipses(self, star_names: list[str] = None, window: tuple[datetime, datetime] = None) -> pd.DataFrame:
+        """
+        Reads the stored eclipses, using the indexes on the star name and mid-eclipse time.
+        :param star_names: The stars to read (None for every star)
+        :param window: UT bounds on the mid-eclipse times to read (inclusive)
+        :return: The ephemeris data in UT, ordered by star then mid-eclipse time
+        """
+        query = 'SELECT star_name, epoch, start, mid, "end" FROM eclipses'
+        conditions, params = [], []
+
+        if window is not None:
+            conditions.append("mid BETWEEN ? AND ?")
+            params += _to_seconds(pd.Series(window))
+
+        if star_names is not None:
+            star_names = list(star_names)
+            conditions.append("star_name IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(star_names))
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY star_name, mid", params).fetchall()
+
+        ephemeris_data = pd.DataFrame.from_records(rows, columns=EPHEMERIS_COLUMNS)
+        for c in TIME_COLUMNS:
+            ephemeris_data[c] = pd.to_datetime(ephemeris_data[c].astype("float64"), unit="s").astype("datetime64[ns]")
+
+        return ephemeris_data
@@ -1,37 +1,46 @@
 from __future__ import annotations
 
-import os
-import time
-from urllib.request import urlopen
+from datetime import date
+from typing import TYPE_CHECKING, Callable, Iterator
 from warnings import warn
-from bs4 import BeautifulSoup
-from os.path import abspath
-from selenium import webdriver
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import Select
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
 
 import numpy as np
-import requests
 
-from .config import Config
+from .config import Config, VSX_URL
+from ._backends import get_backend
+from ._checkpoint import EphemerisCheckpoint
+from ._compact import CompactEphemeris
+from ._export import check_export_path, export_data, wait_for_exports
+from ._instrument import StageEvent, instrumented, profile
+from ._intervals import EclipseIntervals
+from ._parsers import ephemeris_table, parse_ephemeris_dates, td_texts
+from ._schedule import greedy_schedule, weighted_schedule
+from ._targets import TargetClient
+from ._ephemeris import EPHEMERIS_COLUMNS, ELEMENT_COLUMNS, has_elements, predict_eclipses
+from ._staralt import compute_night, dark_window
 from ._utils import *
 from .exceptions import OrderError
+from .store import CatalogueStore
+
+if TYPE_CHECKING:
+    from ._http import HttpClient
+    from .lazy import LazyVSFFrame
 
 
 class VSFFrame:
-    def __init__(self, config: Config, func_flags: dict = None, *args, **kwargs):
+    def __init__(self, config: Config, func_flags: dict = None, *args, compact: CompactEphemeris = None, **kwargs):
         """
         A wrapper for the Pandas DataFrame class that provides decorators and flags specific to the VarStarFinder
         datasets.
         :param config: A Config object containing all the relevant observing options
         :param func_flags: A dictionary of flags provided internally by VSFFrame to track function calls -
             not to be used manually.
+        :param compact: Ephemeris data held as separate targets and eclipse tables, provided internally by VSFFrame
+            in place of data - not to be used manually.
         :param data: Existing data to be stored in the dataframe
         """
-        self.data = pd.DataFrame(*args, **kwargs)
+        self.data = pd.DataFrame(*args, **kwargs) if compact is None else None
+        self._compact = compact
         self._config = config
         self._func_flags = func_flags if func_flags is not None else {
             "request_targets": False,
@@ -39,24 +48,106 @@ class VSFFrame:
             "scrape_staralt": False
         }
 
+    @property
+    def data(self) -> pd.DataFrame:
+        """
+        The dataset. After the ephemeris stages this is joined from the compact tables on first access.
+        """
+        if self._data is None:
+            self._data = self._compact.materialize()
+
+        return self._data
+
+    @data.setter
+    def data(self, data: pd.DataFrame):
+        self._data = data
+        self._compact = None
+        self._intervals = None
+
+    def __len__(self) -> int:
+        """
+        :return: The number of rows in the dataset, without joining the compact tables
+        """
+        return len(self._compact) if self._data is None else len(self._data)
+
+    def memory_usage(self) -> int:
+        """
+        :return: The memory used by the dataset in bytes, counting the compact tables rather than the joined dataset
+            if it hasn't been needed yet
+        """
+        if self._data is None:
+            return self._compact.memory_usage()
+
+        return int(self._data.memory_usage(deep=True).sum())
+
+    def register_hook(self, hook: Callable[[StageEvent], None]):
+        """
+        Registers a callback that receives a StageEvent, with timings and counts, as each stage and sub-step completes.
+        Hooks are shared by every VSFFrame using the same Config. See SummaryReporter and TraceRecorder for built-in
+        hooks.
+        :param hook: The callback
+        """
+        self._config.instrumentation.register(hook)
+
+    def unregister_hook(self, hook: Callable[[StageEvent], None]):
+        """
+        Removes a callback added with register_hook
+        :param hook: The callback
+        """
+        self._config.instrumentation.unregister(hook)
+
+    @staticmethod
+    def profile(path: str = None):
+        """
+        Profiles the enclosed block with cProfile, e.g. `with frame.profile("run.prof"): ...`
+        :param path: A path to dump the profile to. If None, the slowest functions are printed instead.
+        :return: A context manager
+        """
+        return profile(path)
+
+    def _export(self, data: pd.DataFrame, export: str):
+        with self._config.instrumentation.span("export", detail=export, rows=len(data)):
+            export_data(data, export, self._config.background_export)
+
+    @staticmethod
+    def wait_exports():
+        """
+        Waits for any exports running in the background to finish, raising the first error encountered (if any).
+        """
+        wait_for_exports()
+
+    def lazy(self) -> LazyVSFFrame:
+        """
+        Starts a lazy plan from this dataset. Calls on the lazy dataset are recorded and optimised, and only run once
+        collect is called.
+        :return: A lazy version of the dataset
+        """
+        from .lazy import LazyVSFFrame
+
+        return LazyVSFFrame(self._config, source=self)
+
+    def _http_client(self) -> HttpClient:
+        """
+        Creates a client from the fetch backend chosen in the Config
+        """
+        return get_backend("fetch", self._config.fetcher)(self._config)
+
+    @instrumented
     def request_targets(self, export: str = None) -> VSFFrame:
         """
         Requests the target data from https://filtergraph.com/aavso using the provided API.
-        :param export: A path to export the dataset as an xlsx file
+        :param export: A path to export the dataset to, as an xlsx, csv, parquet or feather file
         :return: The targets dataset
         """
-        # Request data and transform into pandas DataFrame
-        response = requests.get("https://filtergraph.com/aavso/api/v1/targets",
-                                auth=(self._config.API_KEY, "api_token"),
-                                params=self._config.params)
+        check_export_path(export)
 
-        targets_json = response.json()['targets']
-        targets = pd.json_normalize(targets_json)
+        # Request data and transform into pandas DataFrame
+        with self._http_client() as client:
+            targets = TargetClient(self._config, client).fetch()
 
-        # Export to xlsx
+        # Export to file
         if export is not None:
-            with open(export, "w") as f:
-                targets.to_excel(export, index=False)
+            self._export(targets, export)
 
         # Set function flag so future functions know this has been run
         self._func_flags['request_targets'] = True
@@ -70,7 +161,7 @@ class VSFFrame:
         :param value: A string that may contain the URL to ephemeris data
         :return: The ephemeris data URL
         """
-        if value is None:
+        if not isinstance(value, str):
             return None
 
         url = re.findall(r"https://www.aavso.org/vsx/index.php\?view=detail.ephemeris[^\s|\]]*", value)
@@ -84,46 +175,49 @@ class VSFFrame:
 
         return url[0]
 
-    @staticmethod
-    def _scrape_star_ephemeris(star_name: str, url: str) -> pd.DataFrame | None:
+    def _scrape_star_ephemeris(self, star_name: str, url: str, client: HttpClient) -> pd.DataFrame | None:
         """
         Scrapes the ephemeris data at the given URL, formatting it into a usable pandas DataFrame
 
         :param star_name: The name of the star, taken from the original dataset. Used as a joining ID
         :param url: The url of the ephemeris data, taken from the original dataset.
+        :param client: The HttpClient used to fetch the page
         :return: A Pandas DataFrame containing the ephemeris data of a star (if it exists)
         """
-        if url is None:
+        if url is None or pd.isna(url):
             return None
 
-        content = urlopen(url).read()
-
-        soup = BeautifulSoup(content, 'html.parser')
+        content = client.get(url)
+        instrumentation = self._config.instrumentation
 
-        # Get all table values, and remove the header / footer values
-        vals = [element.text for element in soup.find_all("td")][3:-2]
-        row_length = vals.index("")
+        with instrumentation.span("parse", detail=star_name, bytes=len(content)) as span:
+            vals = ephemeris_table(td_texts(content, self._config.parser), star_name)
+            span.update(rows=len(vals))
 
-        vals = list(filter(lambda val: val != "", vals))
+        with instrumentation.span("parse_dates", detail=star_name, rows=len(vals)):
+            return parse_ephemeris_dates(vals)
 
-        # Remove titles and reshape into columns
-        cols = [str.lower(x) for x in vals[0:row_length]]
-        cols.insert(0, "star_name")
-
-        vals = vals[row_length:]
-        vals = np.reshape(vals, (-1, row_length))
+    @staticmethod
+    def _target_mask(data: pd.DataFrame, star_names: list[str] = None, dec_range: list[float, float] = None,
+                     ra_range: list[float, float] = None) -> pd.Series:
+        """
+        Builds a boolean mask over the targets data, combining each of the provided filters
+        :return: A mask that is True for the rows to be kept
+        """
+        mask = pd.Series(True, index=data.index)
 
-        id_col = np.full(vals.shape[0], star_name)
-        vals = np.concatenate((id_col[:, np.newaxis], vals), axis=1)
+        if star_names is not None:
+            mask &= data['star_name'].isin(star_names)
 
-        vals = pd.DataFrame(columns=cols, data=vals)
+        if dec_range is not None:
+            mask &= in_range(data['dec'], dec_range)
 
-        # Fix date formats (exclude ID and epoch column)
-        for col in cols[2:]:
-            vals[col] = [convert_to_date(d) for d in vals[col]]
+        if ra_range is not None:
+            mask &= in_range(data['ra'], ra_range)
 
-        return vals
+        return mask
 
+    @instrumented
     def filter_targets(self, star_names: list[str] = None, dec_range: list[float, float] = None,
                        ra_range: list[float, float] = None, export: str = None) -> VSFFrame:
         """
@@ -131,7 +225,7 @@ class VSFFrame:
         :param star_names: A list of stars to be targeted
         :param dec_range: A declination range (inclusive)
         :param ra_range: A right ascension range (inclusive)
-        :param export: A path to export the dataset as an xlsx file
+        :param export: A path to export the dataset to, as an xlsx, csv, parquet or feather file
         :return: The filtered dataset
         """
         # Check previous function call ran successfully
@@ -139,29 +233,28 @@ class VSFFrame:
         if not self._func_flags[prev_function]:
             raise OrderError(self._func_flags, prev_function)
 
-        # Filter dataset based on the parameters provided
-        filtered = self.data.copy()
-
-        if star_names is not None:
-            filtered = filtered[filtered['star_name'].isin(star_names)]
+        check_export_path(export)
 
-        if dec_range is not None:
-            filtered = filtered[filtered.apply(lambda row: in_range(row['dec'], dec_range), axis=1)]
-
-        if ra_range is not None:
-            filtered = filtered[filtered.apply(lambda row: in_range(row['ra'], ra_range), axis=1)]
+        # Filter dataset based on the parameters provided
+        filtered = self.data[self._target_mask(self.data, star_names, dec_range, ra_range)]
 
-        # Export to xlsx
+        # Export to file
         if export is not None:
-            with open(export, "w") as f:
-                filtered.to_excel(export, index=False)
+            self._export(filtered, export)
 
         return VSFFrame(self._config, self._func_flags, data=filtered)
 
-    def scrape_ephemeris(self, export: str = None) -> VSFFrame:
+    @instrumented
+    def scrape_ephemeris(self, date_range: list[str, str] = None, checkpoint: str = None,
+                         export: str = None, store: str | CatalogueStore = None) -> VSFFrame:
         """
         Attaches the ephemeris data to the VSFFrame, provided the request_targets function has already been called.
-        :param export: A path to export the dataset as an xlsx file
+        :param date_range: A date range (inclusive) based on the mid-transit date, as in filter_ephemeris. Eclipses
+            outside of it are dropped as each star is scraped, rather than being kept in memory.
+        :param checkpoint: A path to record each completed star in, so an interrupted run can be resumed from it
+        :param export: A path to export the dataset to, as an xlsx, csv, parquet or feather file
+        :param store: A CatalogueStore (or the path of one) to refresh. Only the stars that are new or stale in the
+            store are scraped, and the eclipses of every star are then read back from it.
         :return: The ephemeris data joined to the targets dataset
         """
         # Check previous function call ran successfully
@@ -169,36 +262,292 @@ class VSFFrame:
         if not self._func_flags[prev_function]:
             raise OrderError(self._func_flags, prev_function)
 
+        check_export_path(export)
+
         # Scrape the ephemeris data for each star
-        self.data['ephemeris_url'] = self.data.apply(lambda row: self._extract_ephemeris_url(row['other_info']), axis=1)
+        data = self._with_ephemeris_urls()
+        window = self._ut_window(date_range) if date_range is not None else None
+
+        if store is None:
+            ephemeris_data = self._fetch_ephemeris(data['star_name'], data['ephemeris_url'], window, checkpoint)
+        else:
+            ephemeris_data = self._refresh_store(store, data, window, checkpoint)
+
+        return self._attach_ephemeris(data, ephemeris_data, export)
+
+    def _refresh_store(self, store: str | CatalogueStore, data: pd.DataFrame,
+                       window: tuple[datetime, datetime] = None, checkpoint: str = None) -> pd.DataFrame:
+        """
+        Saves the targets to a catalogue store, scraping the stars that are new or stale there
+        :param store: A CatalogueStore, or the path of one
+        :param data: The targets data, with an ephemeris_url column
+        :param window: UT bounds on the mid-eclipse times to read back (inclusive)
+        :param checkpoint: A path to record each completed star in, as in _iter_star_ephemeris
+        :return: The ephemeris data of every star, in UT
+        """
+        catalogue = store if isinstance(store, CatalogueStore) else CatalogueStore(store)
+
+        try:
+            catalogue.save_targets(data)
+
+            # Whole pages are stored, so that later runs with other date ranges can use them
+            stale = data[data['star_name'].isin(catalogue.stale_stars(data['star_name']))]
+            for star_name, vals in self._iter_star_ephemeris(stale['star_name'], stale['ephemeris_url'],
+                                                             checkpoint=checkpoint):
+                catalogue.save_ephemeris(star_name, vals)
+
+            return catalogue.eclipses(data['star_name'], window)
+        finally:
+            if catalogue is not store:
+                catalogue.close()
+
+    @classmethod
+    def from_store(cls, config: Config, store: str | CatalogueStore, date_range: list[str, str] = None,
+                   export: str = None) -> VSFFrame:
+        """
+        Builds the ephemeris dataset from a catalogue store alone, without making any requests. The result is the
+        same as calling request_targets and scrape_ephemeris, for every star in the store.
+        :param config: A Config object containing all the relevant observing options
+        :param store: A CatalogueStore, or the path of one
+        :param date_range: A date range (inclusive) based on the mid-transit date, as in filter_ephemeris
+        :param export: A path to export the dataset to, as an xlsx, csv, parquet or feather file
+        :return: The ephemeris data joined to the targets dataset
+        """
+        check_export_path(export)
+
+        catalogue = store if isinstance(store, CatalogueStore) else CatalogueStore(store)
+
+        try:
+            frame = cls(config, {"request_targets": True, "scrape_ephemeris": False, "scrape_staralt": False},
+                        data=catalogue.targets())
+            data = frame._with_ephemeris_urls()
+            window = frame._ut_window(date_range) if date_range is not None else None
+
+            return frame._attach_ephemeris(data, catalogue.eclipses(data['star_name'], window), export)
+        finally:
+            if catalogue is not store:
+                catalogue.close()
+
+    def _with_ephemeris_urls(self) -> pd.DataFrame:
+        """
+        Adds the ephemeris URL of each star to the targets data
+        :return: A copy of the targets data with an ephemeris_url column
+        """
+        data = self.data.copy()
+        data['ephemeris_url'] = data['other_info'].map(self._extract_ephemeris_url).astype(object)
+
+        # Redirect the URLs if the ephemeris pages are served from somewhere other than VSX. Stars without a URL are
+        # left as None, and the column may hold no strings at all
+        if self._config.vsx_url != VSX_URL:
+            vsx_url = self._config.vsx_url
+            data['ephemeris_url'] = data['ephemeris_url'].map(
+                lambda url: url.replace(VSX_URL, vsx_url) if isinstance(url, str) else url)
+
+        return data
+
+    def _ut_window(self, date_range: list[str, str]) -> tuple[datetime, datetime]:
+        """
+        Converts a local date range into UT bounds
+        :param date_range: A date range (inclusive). Dates in the format "%Y-%m-%d"
+        :return: The start and end of the range in UT
+        """
+        ut_offset = timedelta(hours=self._config.ut_offset)
+        start = datetime.strptime(date_range[0], "%Y-%m-%d") - ut_offset
+        end = datetime.strptime(date_range[1], "%Y-%m-%d") - ut_offset
 
-        ephemeris_list = [pd.DataFrame(columns=["star_name", "epoch", "start", "mid", "end"])] + \
-                         [self._scrape_star_ephemeris(x, y) for x, y in zip(self.data['star_name'],
-                                                                            self.data['ephemeris_url'])]
+        return start, end
+
+    def _iter_star_ephemeris(self, star_names: pd.Series, urls: pd.Series, window: tuple[datetime, datetime] = None,
+                             checkpoint: str = None) -> Iterator[tuple[str, pd.DataFrame | None]]:
+        """
+        Scrapes the ephemeris data of each star, yielding them one at a time
+        :param star_names: The names of the stars
+        :param urls: The ephemeris URL of each star
+        :param window: UT bounds on the mid-eclipse times to keep (inclusive)
+        :param checkpoint: A path to record each completed star in. Stars already recorded there are read back rather
+            than being fetched again.
+        :return: An iterator of the star names and their ephemeris data in UT (None if the star has none)
+        """
+        def trim(vals: pd.DataFrame | None) -> pd.DataFrame | None:
+            if vals is not None and window is not None:
+                vals = vals[vals['mid'].between(*window)]
+
+            return vals
+
+        # Stars completed by a previous run are streamed back from the checkpoint
+        store = EphemerisCheckpoint(checkpoint) if checkpoint is not None else None
+        wanted = set(star_names)
+        completed = set()
+
+        if store is not None:
+            for star_name, vals in store.read():
+                if star_name in wanted and star_name not in completed:
+                    completed.add(star_name)
+                    yield star_name, trim(vals)
+
+        pending = [(x, y) for x, y in zip(star_names, urls) if x not in completed]
+        if len(pending) == 0:
+            return
+
+        # Pages are fetched concurrently (if configured), but imap keeps them in the same order as the targets
+        with self._http_client() as client:
+            results = client.imap(lambda x, y: self._scrape_star_ephemeris(x, y, client), *zip(*pending))
+
+            for (star_name, _), vals in zip(pending, results):
+                if store is not None:
+                    store.append(star_name, vals)
+
+                yield star_name, trim(vals)
+
+    def _fetch_ephemeris(self, star_names: pd.Series, urls: pd.Series, window: tuple[datetime, datetime] = None,
+                         checkpoint: str = None) -> pd.DataFrame:
+        """
+        Scrapes the ephemeris data of each star
+        :param star_names: The names of the stars
+        :param urls: The ephemeris URL of each star
+        :param window: UT bounds on the mid-eclipse times to keep (inclusive)
+        :param checkpoint: A path to record each completed star in, as in _iter_star_ephemeris
+        :return: The combined ephemeris data of every star, in UT
+        """
+        ephemeris_list = [pd.DataFrame(columns=EPHEMERIS_COLUMNS)] + \
+                         [vals for _, vals in self._iter_star_ephemeris(star_names, urls, window, checkpoint)]
 
         ephemeris_data = pd.concat(ephemeris_list)
 
-        # Fix datetime formats
-        date_cols = ['start', 'mid', 'end']
-        for c in date_cols:
-            ephemeris_data[c] = ephemeris_data[c].apply(offset_time, args=[self._config.ut_offset])
+        for c in ['start', 'mid', 'end']:
+            ephemeris_data[c] = pd.to_datetime(ephemeris_data[c])
 
-        ephemeris_data['ecliptic_period'] = ephemeris_data.apply(
-            lambda row: (row['end'] - row['start']).total_seconds() / 3600, axis=1)
+        return ephemeris_data
 
-        self.data.drop('ephemeris_url', axis=1)
-        new_dataset = self.data.merge(ephemeris_data, on="star_name", how="left")
+    def _localise_ephemeris(self, ephemeris_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converts ephemeris data from UT into local time, adding the length of each eclipse
+        :param ephemeris_data: The ephemeris data, in UT
+        :return: The ephemeris data in local time
+        """
+        ut_offset = pd.Timedelta(hours=self._config.ut_offset)
+        for c in ['start', 'mid', 'end']:
+            ephemeris_data[c] = pd.to_datetime(ephemeris_data[c]) + ut_offset
 
-        # Export data to xlsx
-        if export is not None:
-            with open(export, "w") as f:
-                new_dataset.to_excel(export, index=False)
+        ephemeris_data['ecliptic_period'] = (ephemeris_data['end'] - ephemeris_data['start']).dt.total_seconds() / 3600
+
+        return ephemeris_data
+
+    def iter_ephemeris(self, date_range: list[str, str] = None, checkpoint: str = None) -> Iterator[pd.DataFrame]:
+        """
+        Scrapes the ephemeris data of each star, yielding it one star at a time rather than holding every star in
+        memory. With a checkpoint, each star is appended to the checkpoint file as it completes, and an interrupted
+        run resumes from the last completed star.
+        :param date_range: A date range (inclusive) based on the mid-transit date, as in filter_ephemeris
+        :param checkpoint: A path to record each completed star in
+        :return: An iterator of the ephemeris data of each star with any, in local time
+        """
+        # Check previous function call ran successfully
+        prev_function = "request_targets"
+        if not self._func_flags[prev_function]:
+            raise OrderError(self._func_flags, prev_function)
+
+        data = self._with_ephemeris_urls()
+        window = self._ut_window(date_range) if date_range is not None else None
+
+        for _, vals in self._iter_star_ephemeris(data['star_name'], data['ephemeris_url'], window, checkpoint):
+            if vals is not None:
+                yield self._localise_ephemeris(vals.copy())
+
+    def _attach_ephemeris(self, data: pd.DataFrame, ephemeris_data: pd.DataFrame, export: str = None) -> VSFFrame:
+        """
+        Converts the ephemeris data into local time and joins it onto the targets data
+        :param data: The targets data
+        :param ephemeris_data: The ephemeris data of each star, in UT
+        :param export: A path to export the dataset to, as an xlsx, csv, parquet or feather file
+        :return: The ephemeris data joined to the targets dataset
+        """
+        # Shift the UT times into local time
+        ephemeris_data = self._localise_ephemeris(ephemeris_data)
+
+        # Keep the targets and eclipses apart, only joining them when the full dataset is needed
+        with self._config.instrumentation.span("merge") as span:
+            compact = CompactEphemeris.from_frames(data, ephemeris_data)
+            span.update(rows=len(compact))
 
         # Set function flag so future functions know this has been run
         self._func_flags['scrape_ephemeris'] = True
 
-        return VSFFrame(self._config, self._func_flags, data=new_dataset)
+        new_frame = VSFFrame(self._config, self._func_flags, compact=compact)
+
+        # Export to file
+        if export is not None:
+            self._export(new_frame.data, export)
+
+        return new_frame
+
+    @instrumented
+    def compute_ephemeris(self, date_range: list[str, str], elements: pd.DataFrame = None,
+                          export: str = None) -> VSFFrame:
+        """
+        Computes the eclipse times of each star from its elements, rather than scraping them from VSX. Only the stars
+        without elements are scraped. Produces the same dataset as scrape_ephemeris, so it can be used in its place.
+        :param date_range: A date range (inclusive) based on the mid-transit date, as in filter_ephemeris
+        :param elements: A table of elements with the columns star_name, epoch (Julian date of a minimum),
+            period (days) and duration (hours). Missing columns are taken from the targets data where available.
+        :param export: A path to export the dataset to, as an xlsx, csv, parquet or feather file
+        :return: The ephemeris data joined to the targets dataset
+        """
+        # Check previous function call ran successfully
+        prev_function = "request_targets"
+        if not self._func_flags[prev_function]:
+            raise OrderError(self._func_flags, prev_function)
+
+        check_export_path(export)
+
+        data = self._with_ephemeris_urls()
+
+        # Line up the elements with the targets, taking anything not supplied from the targets data
+        star_elements = data[['star_name']].reset_index(drop=True)
+        if elements is not None:
+            star_elements = star_elements.merge(elements.drop_duplicates('star_name'), on="star_name", how="left")
+
+        for col in ELEMENT_COLUMNS[1:]:
+            if col not in star_elements:
+                star_elements[col] = np.nan
+            if col in data:
+                star_elements[col] = star_elements[col].fillna(pd.Series(data[col].to_numpy()))
+
+        # Use the same window as scrape_ephemeris, converting from local time into UT
+        window = self._ut_window(date_range)
+
+        computable = has_elements(star_elements).to_numpy()
+        computed = predict_eclipses(star_elements[computable], *window)
+
+        # Fall back to scraping for the stars without elements
+        scraped = self._fetch_ephemeris(data['star_name'][~computable], data['ephemeris_url'][~computable], window)
+
+        # The merge puts the eclipses back into the same order as the targets
+        ephemeris_data = pd.concat([computed, scraped])
+
+        return self._attach_ephemeris(data, ephemeris_data, export)
+
+    @staticmethod
+    def _ephemeris_mask(data: pd.DataFrame, date_range: list[str, str] = None, time_range: list[str, str] = None,
+                        transit_range: list[float, float] = None) -> pd.Series:
+        """
+        Builds a boolean mask over the ephemeris data, combining each of the provided filters
+        :return: A mask that is True for the rows to be kept
+        """
+        mask = pd.Series(True, index=data.index)
+
+        if date_range is not None:
+            mask &= in_date_range(data['mid'], date_range, "%Y-%m-%d")
+
+        if time_range is not None:
+            mask &= in_time_range(data['mid'], time_range, "%H:%M")
 
+        if transit_range is not None:
+            mask &= in_range(data['ecliptic_period'], transit_range)
+
+        return mask
+
+    @instrumented
     def filter_ephemeris(self, date_range: list[str, str] = None, time_range: list[str, str] = None,
                          transit_range: list[float, float] = None, export: str = None) -> VSFFrame:
         """
@@ -206,7 +555,7 @@ class VSFFrame:
         :param date_range: A date range (inclusive) based on the mid-transit date. Dates in the format "%Y-%m-%d"
         :param time_range: A time range (inclusive) based on the mid-transit time. Times in the format "%H:%M"
         :param transit_range: A length of time for the transit to occur, in hours (inclusive)
-        :param export: A path to export the dataset as an xlsx file
+        :param export: A path to export the dataset to, as an xlsx, csv, parquet or feather file
         :return: The filtered dataset
         """
         # Check previous function call ran successfully
@@ -214,70 +563,213 @@ class VSFFrame:
         if not self._func_flags[prev_function]:
             raise OrderError(self._func_flags, prev_function)
 
-        # Filter dataset based on the parameters provided
-        filtered = self.data.copy()
+        check_export_path(export)
 
-        if date_range is not None:
-            filtered = filtered[filtered.apply(lambda row: in_range(row['mid'], date_range, "%Y-%m-%d"), axis=1)]
+        # Filter the eclipse table alone if the full dataset hasn't been needed yet
+        if self._data is None:
+            mask = self._ephemeris_mask(self._compact.eclipse_view(), date_range, time_range, transit_range)
+            filtered = VSFFrame(self._config, self._func_flags,
+                                compact=self._compact.take(np.flatnonzero(mask.to_numpy())))
+        else:
+            mask = self._ephemeris_mask(self.data, date_range, time_range, transit_range)
+            filtered = VSFFrame(self._config, self._func_flags, data=self.data[mask])
 
-        if time_range is not None:
-            filtered = filtered[filtered.apply(lambda row: in_range(row['mid'], time_range, "%H:%M"), axis=1)]
+        # Export to file
+        if export is not None:
+            self._export(filtered.data, export)
 
-        if transit_range is not None:
-            filtered = filtered[filtered.apply(lambda row: in_range(row['ecliptic_period'], transit_range), axis=1)]
+        return filtered
+
+    def _eclipse_intervals(self) -> EclipseIntervals:
+        """
+        Builds the interval index over the eclipse windows on first use, reusing it for every later query
+        """
+        # Check previous function call ran successfully
+        prev_function = "scrape_ephemeris"
+        if not self._func_flags[prev_function]:
+            raise OrderError(self._func_flags, prev_function)
+
+        if self._intervals is None:
+            eclipses = self._compact.eclipses if self._data is None else self.data
+            self._intervals = EclipseIntervals(eclipses['start'], eclipses['end'])
+
+        return self._intervals
+
+    @instrumented
+    def query_eclipses(self, start: str | datetime, end: str | datetime = None, how: str = "overlap",
+                       export: str = None) -> VSFFrame:
+        """
+        Finds the eclipses in a local time window, using an interval index rather than scanning the dataset. The
+        index is built on the first query and reused by later ones.
+        :param start: The start of the window, as a datetime or a string such as "%Y-%m-%d %H:%M"
+        :param end: The end of the window. If None, finds the eclipses in progress at the start time.
+        :param how: 'overlap' for eclipses overlapping the window, 'within' for eclipses lying entirely inside it, or
+            'contains' for eclipses spanning the whole window
+        :param export: A path to export the dataset to, as an xlsx, csv, parquet or feather file
+        :return: The matching rows, ordered by eclipse start time
+        """
+        check_export_path(export)
+
+        intervals = self._eclipse_intervals()
+        positions = intervals.stab(start) if end is None else intervals.query(start, end, how)
 
-        # Export to xlsx
+        if self._data is None:
+            queried = VSFFrame(self._config, self._func_flags, compact=self._compact.take(positions))
+        else:
+            queried = VSFFrame(self._config, self._func_flags, data=self.data.iloc[positions])
+
+        # Export to file
         if export is not None:
-            with open(export, "w") as f:
-                filtered.to_excel(export, index=False)
+            self._export(queried.data, export)
 
-        return VSFFrame(self._config, self._func_flags, data=filtered)
+        return queried
 
-    def _scrape_staralt_plot(self, driver, staralt_input: dict, export: str):
+    @instrumented
+    def query_eclipses_many(self, windows: pd.DataFrame | list[tuple], how: str = "overlap",
+                            export: str = None) -> VSFFrame:
         """
-        Downloads a staralt plot from http://catserver.ing.iac.es/staralt/. The driver must already be on that
-        page for this function to work.
-        :param driver:
-        :param staralt_input:
-        :param export: The folder that the plot is downloaded to
-        :return:
+        Finds the eclipses in each of many local time windows at once, as in query_eclipses.
+        :param windows: A DataFrame with 'start' and 'end' columns, or a list of (start, end) pairs
+        :param how: The type of query, as in query_eclipses
+        :param export: A path to export the dataset to, as an xlsx, csv, parquet or feather file
+        :return: The matching rows of every window, with the position of the window in the first column. Eclipses
+            matching several windows appear once for each.
+        """
+        check_export_path(export)
+
+        intervals = self._eclipse_intervals()
+
+        if not isinstance(windows, pd.DataFrame):
+            windows = pd.DataFrame(list(windows), columns=['start', 'end'])
+
+        window, positions = intervals.query_many(windows['start'], windows['end'], how)
+
+        queried = self._compact.take(positions).materialize() if self._data is None else self.data.iloc[positions]
+        queried = queried.reset_index(drop=True)
+        queried.insert(0, 'window', window)
+
+        # Export to file
+        if export is not None:
+            self._export(queried, export)
+
+        return VSFFrame(self._config, self._func_flags, data=queried)
+
+    @instrumented
+    def schedule_nights(self, priority: str | pd.Series = None, setup: float = 10, sun_altitude: float = -18,
+                        export: str = None) -> VSFFrame:
+        """
+        Builds an observing plan for each night, choosing eclipses that don't overlap. Only eclipses falling entirely
+        within the dark time of the site (from the Config) are considered, and a setup time is left between each
+        eclipse for slewing to the next star. Without a priority, the plan covers as many full eclipses as possible.
+        :param priority: A column of the dataset, or a Series aligned to it, giving the weight of each eclipse. The
+            plan then maximises the total weight instead of the number of eclipses.
+        :param setup: The time needed between eclipses to slew and set up, in minutes
+        :param sun_altitude: The altitude of the Sun that dark time begins and ends at, in degrees
+        :param export: A path to export the dataset to, as an xlsx, csv, parquet or feather file
+        :return: The scheduled eclipses in order of time, with the date that each night begins in the first column
         """
-        # Night date (date that the night begins)
-        day_element = Select(driver.find_element(By.NAME, "form[day]"))
-        day_element.select_by_visible_text(staralt_input['date'].strftime("%d"))  # 2 digit
+        # Check previous function call ran successfully
+        prev_function = "scrape_ephemeris"
+        if not self._func_flags[prev_function]:
+            raise OrderError(self._func_flags, prev_function)
+
+        check_export_path(export)
+
+        data = self.data[self.data['start'].notna() & self.data['end'].notna()]
+
+        # Each night runs from local midday to local midday
+        nights = (data['start'] - pd.Timedelta(hours=12)).dt.date
+
+        site = self._staralt_site()
+        dark = pd.DataFrame([(night, *(dark_window(night, site, sun_altitude) or (pd.NaT, pd.NaT)))
+                             for night in nights.unique()], columns=['night', 'dark_start', 'dark_end'])
+        dark = dark.set_index('night')
+
+        in_dark = (data['start'] >= pd.to_datetime(nights.map(dark['dark_start']))) & \
+                  (data['end'] <= pd.to_datetime(nights.map(dark['dark_end'])))
+        candidates = data[in_dark]
+
+        # Dark times never overlap, so every night can be scheduled in one pass
+        starts = candidates['start'].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        ends = candidates['end'].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        gap = int(pd.Timedelta(minutes=setup).value)
+
+        if priority is None:
+            chosen = greedy_schedule(starts, ends, gap)
+        else:
+            weights = candidates[priority] if isinstance(priority, str) else priority.reindex(candidates.index)
+            chosen = weighted_schedule(starts, ends, weights.fillna(0).to_numpy(dtype=float), gap)
 
-        month_element = Select(driver.find_element(By.NAME, "form[month]"))
-        month_element.select_by_visible_text(staralt_input['date'].strftime("%B"))  # Full month name
+        scheduled = candidates.iloc[chosen].copy()
+        scheduled.insert(0, 'night', nights[in_dark].iloc[chosen])
 
-        year_element = Select(driver.find_element(By.NAME, "form[year]"))
-        year_element.select_by_visible_text(staralt_input['date'].strftime("%Y"))  # Full year
+        # Export to file
+        if export is not None:
+            self._export(scheduled, export)
+
+        return VSFFrame(self._config, self._func_flags, data=scheduled)
 
-        # Observatory location
-        obs_element = driver.find_element(By.NAME, "form[sitecoord]")
-        obs_element.clear()
-        obs_element.send_keys(
-            f"{self._config.longitude} {self._config.latitude} {self._config.elevation} {self._config.ut_offset}")
+    def _staralt_groups(self, group: str) -> list[tuple[date, pd.DataFrame]]:
+        """
+        Groups the stars by the date of their eclipses, for plotting each night
+        :param group: The ephemeris column that the dates are taken from ('start', 'mid' or 'end')
+        :return: A list of the dates, and the star_name, ra and dec of each star eclipsing on that date
+        """
+        dates = self.data[group].dt.date
+        star_data = self.data[['star_name', 'ra', 'dec']][dates.notna()]
+
+        return [(obs_date, stars.copy()) for obs_date, stars in star_data.groupby(dates[dates.notna()], sort=False)]
+
+    def _staralt_site(self) -> dict:
+        return {
+            "latitude": self._config.latitude,
+            "longitude": self._config.longitude,
+            "elevation": self._config.elevation,
+            "ut_offset": self._config.ut_offset
+        }
 
-        # Star coordinates
-        coords_element = driver.find_element(By.NAME, "form[coordlist]")
-        coords_element.clear()
-        coords_element.send_keys(staralt_input['coords'])
+    def compute_altitudes(self, group: str = 'start', step: int = 5) -> pd.DataFrame:
+        """
+        Computes the altitude and airmass of the stars for each night in the dataset, along with the Sun and Moon
+        altitudes. The calculations are done locally using the site parameters in the Config.
+        :param group: How the dates should be grouped, as in scrape_staralt_plots
+        :param step: The spacing of the time grid in minutes
+        :return: A long table with one row per star per time in each night, with times in local time
+        """
+        # Check previous function call ran successfully
+        prev_function = "scrape_ephemeris"
+        if not self._func_flags[prev_function]:
+            raise OrderError(self._func_flags, prev_function)
 
-        # Export options
-        format_element = Select(driver.find_element(By.NAME, "form[format]"))
-        format_element.select_by_visible_text("GIF [attachment]")
+        site = self._staralt_site()
+        nights = [compute_night(obs_date, stars, site, step) for obs_date, stars in self._staralt_groups(group)]
 
-        # Retrieve
-        driver.find_element(By.NAME, "submit").click()
+        return pd.concat(nights, ignore_index=True) if len(nights) > 0 else pd.DataFrame()
 
-        # Rename file
-        file_path = f"{export}/image.gif"
+    @instrumented
+    def render_staralt_plots(self, export: str, group: str = 'start', step: int = 5, file_format: str = "png",
+                             workers: int = None) -> list[str]:
+        """
+        Renders staralt style plots for each day in the dataset, without needing a browser or the staralt website.
+        Plots are named with the date they correspond to, and rendered in parallel across processes.
+        :param export: The folder that the plots are saved to
+        :param group: How the dates should be grouped, as in scrape_staralt_plots
+        :param step: The spacing of the time grid in minutes
+        :param file_format: The image format of the plots
+        :param workers: The number of processes used for rendering (defaults to the number of CPUs)
+        :return: The paths of the saved plots
+        """
+        # Check previous function call ran successfully
+        prev_function = "scrape_ephemeris"
+        if not self._func_flags[prev_function]:
+            raise OrderError(self._func_flags, prev_function)
 
-        while not os.path.exists(file_path):
-            time.sleep(1)
+        render = get_backend("plot", "matplotlib")
 
-        os.rename(file_path, f"{export}/{staralt_input['date']}.gif")
+        return render(self._staralt_groups(group), self._staralt_site(), export, step=step, file_format=file_format,
+                      workers=workers)
 
+    @instrumented
     def scrape_staralt_plots(self, export: str, group: str = 'start'):
         """
         Downloads the staralt plots for each day in the dataset. Plots are downloaded as gif files, named with the date
@@ -292,31 +784,7 @@ class VSFFrame:
         if not self._func_flags[prev_function]:
             raise OrderError(self._func_flags, prev_function)
 
-        # Extract required staralt data, grouped by start date
-        start_dates = self.data[group].dt.date.unique()
-        staralt_inputs = []
-
-        for obs_date in start_dates:
-            star_data = self.data[self.data[group].dt.date == obs_date][['star_name', 'ra', 'dec']]
-            star_data['star_name'] = star_data['star_name'].str.replace(' ', '_')
-
-            star_string = star_data.to_string(header=False, index=False, index_names=False)
-            star_string = re.sub("^\s+", "", star_string)
-
-            staralt_inputs.append({"date": obs_date, "coords": star_string})
-
-        opts = Options()
-        opts.add_experimental_option("prefs", {
-            "download.default_directory": abspath(export),
-            "download.prompt_for_download": False
-        })
-        opts.add_argument("--no-sandbox")
-
-        driver = webdriver.Chrome(options=opts, service=Service(ChromeDriverManager().install()))
-
-        driver.get("http://catserver.ing.iac.es/staralt/")
-
-        for staralt_input in staralt_inputs:
-            self._scrape_staralt_plot(driver, staralt_input, export)
+        # The browser is only loaded when plots are first scraped
+        scrape = get_backend("plot", "selenium")
 
-        driver.close()
+        scrape(self._staralt_groups(group), self._staralt_site(), export, url=self._config.staralt_url)
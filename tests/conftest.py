@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+import varstarfinder as vsf
+from varstarfinder._http import HttpClient
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+
+@pytest.fixture
+def config(monkeypatch):
+    with open(os.path.join(FIXTURES, "targets.json"), "rb") as f:
+        targets = f.read()
+    with open(os.path.join(FIXTURES, "ephemeris", "sample.html"), "rb") as f:
+        page = f.read()
+
+    config = vsf.Config("key", latitude=-33.7738, longitude=151.1126, elevation=61, ut_offset=10)
+    monkeypatch.setattr(HttpClient, "get",
+                        lambda self, url, params=None, **kwargs: targets if url == config.targets_url else page)
+
+    return config
+
+
+@pytest.fixture
+def pages(config, monkeypatch):
+    fetched = []
+    get = HttpClient.get
+
+    def counting_get(self, url, params=None, **kwargs):
+        if url != config.targets_url:
+            fetched.append(url)
+        return get(self, url, params, **kwargs)
+
+    monkeypatch.setattr(HttpClient, "get", counting_get)
+    return fetched
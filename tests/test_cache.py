@@ -0,0 +1,47 @@
+import os
+
+from varstarfinder._cache import EVICT_TARGET, ResponseCache
+
+
+def cache_size(directory) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(".bin"))
+
+
+def test_size_limit_is_kept(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_size=10_000)
+
+    for i in range(100):
+        cache.put(f"https://example.com/{i}", b"x" * 500)
+        assert cache_size(tmp_path) <= 10_000
+        assert cache._size == cache_size(tmp_path)
+
+    assert cache.get("https://example.com/99") == b"x" * 500
+    assert cache.get("https://example.com/0") is None
+
+
+def test_replacing_an_entry_counts_only_the_new_size(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_size=10_000)
+
+    for _ in range(50):
+        cache.put("https://example.com", b"x" * 500)
+
+    assert cache._size == 500
+
+
+def test_existing_entries_are_counted_on_open(tmp_path):
+    ResponseCache(str(tmp_path)).put("https://example.com/old", b"x" * 6_000)
+    cache = ResponseCache(str(tmp_path), max_size=10_000)
+
+    cache.put("https://example.com/new", b"x" * 6_000)
+
+    assert cache.get("https://example.com/old") is None
+    assert cache_size(tmp_path) <= 10_000 * EVICT_TARGET
+
+
+def test_clear_resets_the_size(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_size=10_000)
+    cache.put("https://example.com", b"x" * 500)
+    cache.clear()
+
+    assert cache._size == 0
+    assert cache_size(tmp_path) == 0
@@ -0,0 +1,47 @@
+import json
+
+import pandas as pd
+
+import varstarfinder as vsf
+from varstarfinder._checkpoint import EphemerisCheckpoint
+
+
+def test_partial_line_is_dropped(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    vals = pd.DataFrame({"epoch": ["1"], "mid": pd.to_datetime(["2022-09-20 01:30"])})
+
+    checkpoint = EphemerisCheckpoint(path)
+    checkpoint.append("A", vals)
+    checkpoint.append("B", None)
+    with open(path, "a") as f:
+        f.write('{"star_name": "C", "da')
+
+    checkpoint = EphemerisCheckpoint(path)
+    checkpoint.append("D", None)
+    records = list(checkpoint.read())
+
+    assert [name for name, _ in records] == ["A", "B", "D"]
+    pd.testing.assert_frame_equal(records[0][1], vals, check_dtype=False)
+    assert records[1][1] is None
+
+
+def test_resume_skips_completed_stars(config, pages, tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    full = vsf.VSFFrame(config).request_targets().scrape_ephemeris(checkpoint=path)
+    assert len(pages) == 2
+
+    # Keep the first star, and half of the next line, as an interrupted run would
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    with open(path, "wb") as f:
+        f.write(lines[0] + lines[1][:len(lines[1]) // 2])
+
+    targets = vsf.VSFFrame(config).request_targets()
+    urls = targets._with_ephemeris_urls().set_index("star_name")['ephemeris_url']
+    completed = json.loads(lines[0])['star_name']
+
+    resumed = targets.scrape_ephemeris(checkpoint=path)
+
+    assert len(pages) == 3
+    assert pages[2] != urls[completed]
+    pd.testing.assert_frame_equal(resumed.data, full.data)
@@ -0,0 +1,58 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import varstarfinder as vsf
+from varstarfinder._ephemeris import datetime_to_jd, predict_eclipses
+from varstarfinder._parsers import ephemeris_table, parse_ephemeris_dates, td_texts
+from conftest import FIXTURES
+
+
+# The elements that the sample ephemeris page was generated from
+ELEMENTS = {"epoch": datetime_to_jd(datetime(2022, 9, 19, 1, 30)), "period": 1.37, "duration": 3}
+
+
+def scraped_page() -> pd.DataFrame:
+    with open(os.path.join(FIXTURES, "ephemeris", "sample.html"), "rb") as f:
+        return parse_ephemeris_dates(ephemeris_table(td_texts(f.read()), "X"))
+
+
+def assert_close(a: pd.Series, b: pd.Series):
+    # The page is rounded to the minute
+    assert np.all(np.abs((a.to_numpy() - b.to_numpy()) / np.timedelta64(1, "s")) <= 60)
+
+
+def test_predicted_eclipses_match_the_page():
+    page = scraped_page()
+    elements = pd.DataFrame([{"star_name": "X", **ELEMENTS}])
+
+    minute = pd.Timedelta(minutes=1)
+    predicted = predict_eclipses(elements, page['mid'].iloc[0] - minute, page['mid'].iloc[-1] + minute)
+
+    assert len(predicted) == len(page)
+    for c in ["start", "mid", "end"]:
+        assert_close(predicted[c], page[c])
+
+
+def test_predicted_window_is_inclusive():
+    elements = pd.DataFrame([{"star_name": "X", **ELEMENTS}, {"star_name": "Y", **ELEMENTS, "period": np.nan}])
+    mid = datetime(2022, 9, 19, 1, 30)
+
+    predicted = predict_eclipses(elements, mid, mid)
+
+    assert predicted['star_name'].tolist() == ["X"]
+    assert predicted['epoch'].tolist() == [0]
+
+
+def test_compute_matches_scrape(config):
+    elements = pd.DataFrame([{"star_name": name, **ELEMENTS} for name in ["TY Men", "V0335 Vel"]])
+    date_range = ["2022-09-20", "2022-09-24"]
+
+    scraped = vsf.VSFFrame(config).request_targets().scrape_ephemeris(date_range=date_range).data
+    computed = vsf.VSFFrame(config).request_targets().compute_ephemeris(date_range, elements).data
+
+    scraped, computed = (data.dropna(subset="mid").reset_index(drop=True) for data in (scraped, computed))
+    assert computed['star_name'].tolist() == scraped['star_name'].tolist()
+    assert_close(computed['mid'], scraped['mid'])
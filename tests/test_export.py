@@ -0,0 +1,38 @@
+import threading
+
+import pandas as pd
+import pytest
+
+import varstarfinder as vsf
+from varstarfinder import _export
+from varstarfinder._export import export_data, wait_for_exports
+
+
+def test_background_export_is_a_snapshot(monkeypatch, tmp_path):
+    release = threading.Event()
+
+    def blocked_csv(data: pd.DataFrame, path: str):
+        assert release.wait(5)
+        data.to_csv(path, index=False)
+
+    monkeypatch.setitem(_export.EXPORTERS, ".csv", blocked_csv)
+    data = pd.DataFrame({"star_name": ["A", "B"], "dec": [-10.0, -20.0]})
+
+    export_data(data, str(tmp_path / "out.csv"), background=True)
+    data.loc[0, "dec"] = 99.0
+    release.set()
+    wait_for_exports()
+
+    assert pd.read_csv(tmp_path / "out.csv")['dec'].tolist() == [-10.0, -20.0]
+
+
+def test_unsupported_extensions_fail_before_the_stage(config, pages, tmp_path):
+    frame = vsf.VSFFrame(config).request_targets()
+
+    with pytest.raises(ValueError):
+        frame.scrape_ephemeris(export=str(tmp_path / "out.txt"))
+    with pytest.raises(ValueError):
+        vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris(export=str(tmp_path / "out.txt"))
+
+    assert pages == []
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+import requests
+
+import varstarfinder as vsf
+from varstarfinder import _http
+from varstarfinder._http import HttpClient
+
+
+class StubSession:
+    def __init__(self, outcomes: list):
+        """
+        Stands in for requests.Session, returning (or raising) each outcome in turn
+        :param outcomes: Status codes to respond with, or exceptions to raise
+        """
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        outcome = self.outcomes[self.calls]
+        self.calls += 1
+
+        if isinstance(outcome, Exception):
+            raise outcome
+
+        response = requests.Response()
+        response.status_code = outcome
+        response.url = url
+        response._content = str(outcome).encode()
+        return response
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> list:
+    delays = []
+    monkeypatch.setattr(_http.time, "sleep", delays.append)
+    return delays
+
+
+def client(outcomes: list, **kwargs) -> HttpClient:
+    config = vsf.Config("key", latitude=-33.7738, longitude=151.1126, elevation=61, ut_offset=10, **kwargs)
+    http = HttpClient(config)
+    http._session = StubSession(outcomes)
+    return http
+
+
+def test_retries_with_backoff(sleeps):
+    http = client([503, 502, 200], backoff=0.5)
+
+    assert http.get("https://example.com") == b"200"
+    assert http._session.calls == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_connection_errors_are_retried(sleeps):
+    http = client([requests.ConnectionError(), 200], backoff=0.5)
+
+    assert http.get("https://example.com") == b"200"
+    assert sleeps == [0.5]
+
+
+def test_gives_up_after_the_last_retry(sleeps):
+    http = client([503] * 3, retries=2, backoff=0.5)
+
+    with pytest.raises(requests.HTTPError):
+        http.get("https://example.com")
+
+    assert http._session.calls == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_other_errors_are_not_retried(sleeps):
+    http = client([404, 200])
+
+    with pytest.raises(requests.HTTPError):
+        http.get("https://example.com")
+
+    assert http._session.calls == 1
+    assert sleeps == []
+
+
+@pytest.mark.parametrize("method", ["map", "imap"])
+def test_results_keep_the_input_order(method):
+    http = client([], workers=4)
+    done = [threading.Event() for _ in range(4)]
+    completed = []
+    lock = threading.Lock()
+
+    def fetch(i: int) -> int:
+        # Each item waits for the one after it, so they complete in reverse order
+        if i + 1 < len(done):
+            assert done[i + 1].wait(5)
+
+        with lock:
+            completed.append(i)
+        done[i].set()
+        return i * 10
+
+    assert list(getattr(http, method)(fetch, range(4))) == [0, 10, 20, 30]
+    assert completed == [3, 2, 1, 0]
@@ -0,0 +1,13 @@
+import varstarfinder as vsf
+
+
+def test_hooks_count_rows_without_joining(config):
+    events = []
+    frame = vsf.VSFFrame(config)
+    frame.register_hook(events.append)
+
+    frame = frame.request_targets().scrape_ephemeris()
+    frame = frame.filter_ephemeris(date_range=["2022-09-20", "2022-09-30"])
+
+    assert frame._data is None
+    assert next(event for event in reversed(events) if event.stage == "filter_ephemeris").rows == len(frame.data)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from varstarfinder._intervals import EclipseIntervals
+
+
+def hours(values) -> pd.Series:
+    return pd.Timestamp("2022-09-20") + pd.to_timedelta(pd.Series(values, dtype="float64"), unit="h")
+
+
+@pytest.fixture
+def index() -> EclipseIntervals:
+    # Position 2 lasts far longer than the others, and position 4 is missing its end
+    return EclipseIntervals(hours([1, 4, 0, 6, 2]), hours([3, 5, 20, 7, None]))
+
+
+def test_touching_boundaries_match(index):
+    assert index.query(hours([3])[0], hours([4])[0], "overlap").tolist() == [2, 0, 1]
+    assert index.query(hours([1])[0], hours([5])[0], "within").tolist() == [0, 1]
+    assert index.query(hours([4])[0], hours([5])[0], "contains").tolist() == [2, 1]
+    assert index.stab(hours([7])[0]).tolist() == [2, 3]
+
+
+def test_long_eclipses_are_found(index):
+    # The long eclipse starts well before the window, so is only found through the longest duration
+    assert index.query(hours([18])[0], hours([19])[0], "overlap").tolist() == [2]
+    assert index.query(hours([18])[0], hours([19])[0], "contains").tolist() == [2]
+    assert index.query(hours([18])[0], hours([19])[0], "within").tolist() == []
+    assert index.query(hours([-1])[0], hours([21])[0], "within").tolist() == [2, 0, 1, 3]
+
+
+def test_empty_index():
+    index = EclipseIntervals(pd.Series([], dtype="datetime64[ns]"), pd.Series([], dtype="datetime64[ns]"))
+
+    assert len(index) == 0
+    for how in ["overlap", "within", "contains"]:
+        assert index.query(hours([0])[0], hours([1])[0], how).tolist() == []
+
+
+def test_query_many_matches_brute_force():
+    rng = np.random.default_rng(0)
+    starts = rng.integers(0, 100, 200)
+    ends = starts + rng.integers(0, 10, 200)
+    q_starts = rng.integers(-5, 105, 50)
+    q_ends = q_starts + rng.integers(0, 15, 50)
+    index = EclipseIntervals(hours(starts), hours(ends))
+
+    for how, match in [("overlap", lambda s, e, qs, qe: (s <= qe) & (e >= qs)),
+                       ("within", lambda s, e, qs, qe: (s >= qs) & (e <= qe)),
+                       ("contains", lambda s, e, qs, qe: (s <= qs) & (e >= qe))]:
+        window, positions = index.query_many(hours(q_starts), hours(q_ends), how)
+
+        for i, (qs, qe) in enumerate(zip(q_starts, q_ends)):
+            assert sorted(positions[window == i].tolist()) == np.flatnonzero(match(starts, ends, qs, qe)).tolist()
+
+
+def test_unknown_query_type(index):
+    with pytest.raises(ValueError):
+        index.query(hours([0])[0], hours([1])[0], "nearest")
@@ -0,0 +1,174 @@
+import pandas as pd
+import pytest
+
+import varstarfinder as vsf
+from varstarfinder.lazy import LazyVSFFrame
+
+
+def names(lazy: LazyVSFFrame) -> list[str]:
+    return [step.name for step in lazy.optimize()]
+
+
+def test_target_filters_are_pushed_ahead_of_ephemeris(config):
+    lazy = vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris().filter_targets(dec_range=[-90, 0])
+
+    assert names(lazy) == ["request_targets", "filter_targets", "scrape_ephemeris"]
+
+
+def test_target_filters_are_not_pushed_past_an_export(config):
+    lazy = vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris(export="eph.csv") \
+        .filter_targets(dec_range=[-90, 0])
+
+    assert names(lazy) == ["request_targets", "scrape_ephemeris", "filter_targets"]
+
+
+def test_target_filters_are_not_pushed_past_a_store(config, tmp_path):
+    lazy = vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris(store=str(tmp_path / "eager.db")) \
+        .filter_targets(dec_range=[-90, -50])
+
+    assert names(lazy) == ["request_targets", "scrape_ephemeris", "filter_targets"]
+
+
+def test_lazy_store_matches_eager(config, tmp_path):
+    def plan(frame, path):
+        return frame.request_targets().scrape_ephemeris(store=str(path)).filter_targets(dec_range=[-90, -50])
+
+    eager = plan(vsf.VSFFrame(config), tmp_path / "eager.db").data
+    lazy = plan(vsf.LazyVSFFrame(config), tmp_path / "lazy.db").collect().data
+
+    pd.testing.assert_frame_equal(lazy.reset_index(drop=True), eager.reset_index(drop=True), check_dtype=False)
+    with vsf.CatalogueStore(str(tmp_path / "eager.db")) as eager, vsf.CatalogueStore(str(tmp_path / "lazy.db")) as lazy:
+        pd.testing.assert_frame_equal(lazy.targets(), eager.targets())
+        pd.testing.assert_frame_equal(lazy.eclipses(), eager.eclipses())
+
+
+def test_exporting_target_filter_stays_in_place(config):
+    lazy = vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris() \
+        .filter_targets(dec_range=[-90, 0], export="x.csv")
+    steps = lazy.optimize()
+
+    assert [step.name for step in steps] == ["request_targets", "filter_targets", "scrape_ephemeris", "filter_targets"]
+    assert steps[1].export is None
+    assert steps[3].export == "x.csv"
+
+
+def test_adjacent_filters_are_merged(config):
+    lazy = vsf.LazyVSFFrame(config).request_targets() \
+        .filter_targets(dec_range=[-90, 0]).filter_targets(dec_range=[-60, 10], ra_range=[0, 180]) \
+        .scrape_ephemeris() \
+        .filter_ephemeris(transit_range=[0, 6]).filter_ephemeris(transit_range=[1, 8])
+    steps = lazy.optimize()
+
+    assert [step.name for step in steps] == ["request_targets", "filter_targets", "scrape_ephemeris",
+                                             "filter_ephemeris"]
+    assert steps[1].kwargs['dec_range'] == [-60, 0]
+    assert steps[1].kwargs['ra_range'] == [0, 180]
+    assert steps[3].kwargs['transit_range'] == [1, 6]
+
+
+def test_filters_are_not_merged_past_an_export(config):
+    lazy = vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris() \
+        .filter_ephemeris(transit_range=[0, 6], export="x.csv").filter_ephemeris(transit_range=[1, 8])
+
+    assert names(lazy).count("filter_ephemeris") == 2
+
+
+def test_different_time_ranges_are_not_merged(config):
+    lazy = vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris() \
+        .filter_ephemeris(time_range=["19:30", "00:00"]).filter_ephemeris(time_range=["22:00", "02:00"])
+
+    assert names(lazy).count("filter_ephemeris") == 2
+
+
+def test_date_windows_are_pushed_into_the_ephemeris_stage(config):
+    lazy = vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris() \
+        .filter_ephemeris(date_range=["2022-09-20", "2022-09-30"])
+
+    assert lazy.optimize()[1].kwargs['date_range'] == ["2022-09-20", "2022-09-30"]
+
+
+def test_unpadded_date_windows_are_compared_as_dates(config):
+    lazy = vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris() \
+        .filter_ephemeris(date_range=["2022-9-1", "2022-9-30"]) \
+        .filter_ephemeris(date_range=["2022-09-10", "2022-10-15"])
+
+    assert lazy.optimize()[1].kwargs['date_range'] == ["2022-09-10", "2022-09-30"]
+
+
+def test_date_windows_are_not_pushed_into_an_exporting_stage(config):
+    lazy = vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris(export="eph.csv") \
+        .filter_ephemeris(date_range=["2022-09-20", "2022-09-30"])
+
+    assert lazy.optimize()[1].kwargs['date_range'] is None
+
+
+def test_unselected_columns_are_pruned(config):
+    lazy = vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris().filter_targets(dec_range=[-90, 0]) \
+        .select(["star_name", "mid"])
+    steps = lazy.optimize()
+
+    assert [step.name for step in steps] == ["request_targets", "filter_targets", "prune", "scrape_ephemeris",
+                                             "select"]
+    assert set(steps[2].kwargs['columns']) == {"star_name", "mid", "other_info"}
+
+
+def test_columns_are_not_pruned_with_an_export(config):
+    lazy = vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris(export="eph.csv").select(["star_name"])
+
+    assert "prune" not in names(lazy)
+
+
+PLANS = [
+    lambda f: f.request_targets().scrape_ephemeris().filter_targets(dec_range=[-90, -20]),
+    lambda f: f.request_targets().scrape_ephemeris().filter_ephemeris(date_range=["2022-09-20", "2022-09-30"])
+    .filter_ephemeris(time_range=["19:30", "00:00"]),
+    lambda f: f.request_targets().filter_targets(dec_range=[-90, 0]).filter_targets(ra_range=[100, 360])
+    .scrape_ephemeris().filter_ephemeris(transit_range=[0, 6]).filter_ephemeris(transit_range=[2, 8]),
+    lambda f: f.request_targets().scrape_ephemeris().filter_targets(star_names=["TY Men", "V0335 Vel"])
+    .filter_ephemeris(date_range=["2022-09-19", "2022-10-05"]),
+    lambda f: f.request_targets().scrape_ephemeris().filter_ephemeris(date_range=["2022-9-1", "2022-9-30"])
+    .filter_ephemeris(date_range=["2022-09-10", "2022-10-15"]),
+]
+
+
+@pytest.mark.parametrize("plan", PLANS)
+def test_lazy_matches_eager(config, plan):
+    eager = plan(vsf.VSFFrame(config)).data
+    lazy = plan(vsf.LazyVSFFrame(config)).collect().data
+
+    pd.testing.assert_frame_equal(lazy.reset_index(drop=True), eager.reset_index(drop=True), check_dtype=False)
+
+
+def test_lazy_select_matches_eager(config):
+    columns = ["star_name", "dec", "mid"]
+    eager = vsf.VSFFrame(config).request_targets().scrape_ephemeris().filter_targets(dec_range=[-90, 0]) \
+        .data[columns]
+    lazy = vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris().filter_targets(dec_range=[-90, 0]) \
+        .select(columns).collect().data
+
+    pd.testing.assert_frame_equal(lazy.reset_index(drop=True), eager.reset_index(drop=True), check_dtype=False)
+
+
+def test_lazy_exports_match_eager(config, tmp_path):
+    def plan(frame, prefix):
+        return frame.request_targets().scrape_ephemeris(export=str(tmp_path / f"{prefix}_eph.csv")) \
+            .filter_targets(dec_range=[-90, 0], export=str(tmp_path / f"{prefix}_targets.csv")) \
+            .filter_ephemeris(date_range=["2022-09-20", "2022-09-30"], export=str(tmp_path / f"{prefix}_filtered.csv"))
+
+    plan(vsf.VSFFrame(config), "eager")
+    plan(vsf.LazyVSFFrame(config), "lazy").collect()
+
+    for name in ["eph", "targets", "filtered"]:
+        eager = pd.read_csv(tmp_path / f"eager_{name}.csv")
+        lazy = pd.read_csv(tmp_path / f"lazy_{name}.csv")
+
+        pd.testing.assert_frame_equal(lazy, eager)
+
+
+def test_lazy_export_of_pushed_target_filter_matches_eager(config, tmp_path):
+    vsf.VSFFrame(config).request_targets().scrape_ephemeris() \
+        .filter_targets(dec_range=[-90, 0], export=str(tmp_path / "eager.csv"))
+    vsf.LazyVSFFrame(config).request_targets().scrape_ephemeris() \
+        .filter_targets(dec_range=[-90, 0], export=str(tmp_path / "lazy.csv")).collect()
+
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "lazy.csv"), pd.read_csv(tmp_path / "eager.csv"))
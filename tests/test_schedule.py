@@ -0,0 +1,68 @@
+from datetime import date, datetime
+from itertools import combinations
+
+import numpy as np
+
+from varstarfinder._schedule import greedy_schedule, weighted_schedule
+from varstarfinder._staralt import dark_window
+
+
+SYDNEY = {"latitude": -33.7738, "longitude": 151.1126, "elevation": 61, "ut_offset": 10}
+
+
+def test_greedy_takes_the_earliest_ends():
+    starts, ends = np.array([0, 1, 2, 4]), np.array([3, 2, 5, 6])
+
+    assert greedy_schedule(starts, ends).tolist() == [1, 2]
+    assert greedy_schedule(starts, ends, gap=1).tolist() == [1, 3]
+
+
+def test_greedy_breaks_ties_on_end_by_start():
+    # The zero length interval at the shared end fits after the longer one, but not the other way round
+    starts, ends = np.array([5, 0, 3]), np.array([5, 5, 5])
+
+    assert greedy_schedule(starts, ends).tolist() == [1, 0]
+    assert weighted_schedule(starts, ends, np.ones(3)).tolist() == [1, 0]
+
+
+def test_weighted_beats_greedy():
+    starts, ends, weights = np.array([0, 0, 5]), np.array([10, 4, 9]), np.array([10, 1, 1])
+
+    assert greedy_schedule(starts, ends).tolist() == [1, 2]
+    assert weighted_schedule(starts, ends, weights).tolist() == [0]
+
+
+def test_schedules_match_brute_force():
+    rng = np.random.default_rng(0)
+
+    for _ in range(50):
+        starts = rng.integers(0, 20, 7)
+        ends = starts + rng.integers(0, 6, 7)
+        weights = rng.integers(1, 5, 7)
+        gap = int(rng.integers(0, 2))
+
+        def compatible(chosen) -> bool:
+            chosen = sorted(chosen, key=lambda i: (ends[i], starts[i]))
+            return all(starts[b] - gap >= ends[a] for a, b in zip(chosen, chosen[1:]))
+
+        subsets = [c for n in range(8) for c in combinations(range(7), n) if compatible(c)]
+        greedy = greedy_schedule(starts, ends, gap)
+        weighted = weighted_schedule(starts, ends, weights, gap)
+
+        assert compatible(greedy) and len(greedy) == max(len(c) for c in subsets)
+        assert compatible(weighted) and weights[weighted].sum() == max(weights[list(c)].sum() for c in subsets)
+
+
+def test_dark_window():
+    start, end = dark_window(date(2022, 9, 20), SYDNEY)
+
+    assert datetime(2022, 9, 20, 18, 30) < start < datetime(2022, 9, 20, 20)
+    assert datetime(2022, 9, 21, 4) < end < datetime(2022, 9, 21, 5, 30)
+
+
+def test_dark_window_near_the_poles():
+    # The Sun never gets below astronomical twilight in an arctic summer, and never rises to it at the South Pole
+    # in winter
+    assert dark_window(date(2022, 6, 21), {**SYDNEY, "latitude": 78}) is None
+    assert dark_window(date(2022, 6, 21), {**SYDNEY, "latitude": -89}) == (datetime(2022, 6, 21, 12),
+                                                                             datetime(2022, 6, 22, 12))
@@ -0,0 +1,26 @@
+import json
+import threading
+import urllib.request
+
+import varstarfinder as vsf
+
+
+def test_stop_without_start(config):
+    service = vsf.PlannerService(config, port=0)
+
+    thread = threading.Thread(target=service.stop, daemon=True)
+    thread.start()
+    thread.join(5)
+
+    assert not thread.is_alive()
+
+
+def test_status(config):
+    with vsf.PlannerService(config, port=0) as service:
+        service.refresh()
+
+        with urllib.request.urlopen(f"{service.url}/status", timeout=5) as response:
+            status = json.loads(response.read())
+
+    assert status['ready']
+    assert status['last_error'] is None
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pandas as pd
+
+import varstarfinder as vsf
+
+
+def targets(urls: dict) -> pd.DataFrame:
+    return pd.DataFrame({"star_name": list(urls), "dec": [-10.0] * len(urls), "ephemeris_url": list(urls.values())})
+
+
+def eclipses(mids: list[str]) -> pd.DataFrame:
+    mids = pd.to_datetime(mids)
+    return pd.DataFrame({"epoch": range(len(mids)), "start": mids - pd.Timedelta(hours=1), "mid": mids,
+                         "end": mids + pd.Timedelta(hours=1)})
+
+
+def test_new_and_changed_stars_are_stale(tmp_path):
+    with vsf.CatalogueStore(str(tmp_path / "store.db")) as store:
+        store.save_targets(targets({"A": "https://a", "B": "https://b", "C": None}))
+        assert store.stale_stars(pd.Series(["A", "B", "C", "D"])) == ["A", "B", "D"]
+
+        store.save_ephemeris("A", eclipses(["2022-09-20 12:00"]))
+        store.save_ephemeris("B", None)
+        assert store.stale_stars(pd.Series(["A", "B", "C"])) == []
+
+        store.save_targets(targets({"A": "https://a", "B": "https://b2", "C": None}))
+        assert store.stale_stars(pd.Series(["A", "B", "C"])) == ["B"]
+
+
+def test_old_stars_are_stale(tmp_path):
+    with vsf.CatalogueStore(str(tmp_path / "store.db"), max_age=-1) as store:
+        store.save_targets(targets({"A": "https://a"}))
+        store.save_ephemeris("A", eclipses(["2022-09-20 12:00"]))
+
+        assert store.stale_stars(pd.Series(["A"])) == ["A"]
+
+
+def test_eclipses_are_read_by_star_and_window(tmp_path):
+    with vsf.CatalogueStore(str(tmp_path / "store.db")) as store:
+        store.save_targets(targets({"A": "https://a", "B": "https://b"}))
+        store.save_ephemeris("A", eclipses(["2022-09-22 00:00", "2022-09-20 00:00", "2022-09-25 00:00"]))
+        store.save_ephemeris("B", eclipses(["2022-09-21 00:00"]))
+
+        data = store.eclipses(window=(datetime(2022, 9, 20), datetime(2022, 9, 22)))
+        assert data['star_name'].tolist() == ["A", "A", "B"]
+        assert data['mid'].tolist() == list(pd.to_datetime(["2022-09-20", "2022-09-22", "2022-09-21"]))
+        assert data['mid'].dtype == "datetime64[ns]"
+
+        assert store.eclipses(["B"])['mid'].tolist() == [pd.Timestamp("2022-09-21")]
+
+        # Saving a star again replaces its eclipses
+        store.save_ephemeris("A", eclipses(["2022-09-23 00:00"]))
+        assert store.eclipses(["A"])['mid'].tolist() == [pd.Timestamp("2022-09-23")]
+
+
+def test_refresh_only_scrapes_stale_stars(config, pages, tmp_path):
+    path = str(tmp_path / "store.db")
+
+    first = vsf.VSFFrame(config).request_targets().scrape_ephemeris(store=path)
+    assert len(pages) == 2
+
+    # A date range past the end of the stored pages doesn't scrape them again
+    second = vsf.VSFFrame(config).request_targets().scrape_ephemeris(date_range=["2022-11-01", "2022-12-31"],
+                                                                     store=path)
+    assert len(pages) == 2
+    assert second.data['mid'].max() == first.data['mid'].max()
+
+    with vsf.CatalogueStore(path, max_age=-1) as store:
+        vsf.VSFFrame(config).request_targets().scrape_ephemeris(store=store)
+    assert len(pages) == 4
+
+
+def test_store_matches_scrape(config, tmp_path):
+    path = str(tmp_path / "store.db")
+    scraped = vsf.VSFFrame(config).request_targets().scrape_ephemeris(date_range=["2022-09-20", "2022-09-30"])
+    stored = vsf.VSFFrame(config).request_targets().scrape_ephemeris(date_range=["2022-09-20", "2022-09-30"],
+                                                                     store=path)
+    offline = vsf.VSFFrame.from_store(config, path, date_range=["2022-09-20", "2022-09-30"])
+
+    pd.testing.assert_frame_equal(stored.data, scraped.data, check_dtype=False)
+    pd.testing.assert_frame_equal(offline.data, scraped.data, check_dtype=False)
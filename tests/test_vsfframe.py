@@ -0,0 +1,27 @@
+import varstarfinder as vsf
+
+
+def test_ephemeris_urls_are_redirected(config):
+    config.vsx_url = "http://localhost:8000/vsx"
+    frame = vsf.VSFFrame(config).request_targets()
+
+    urls = frame._with_ephemeris_urls()['ephemeris_url']
+
+    assert urls.dropna().str.startswith("http://localhost:8000/vsx/index.php?").all()
+    assert urls.isna().sum() == 1
+
+
+def test_redirecting_handles_missing_urls(config):
+    config.vsx_url = "http://localhost:8000/vsx"
+    frame = vsf.VSFFrame(config).request_targets()
+    frame = vsf.VSFFrame(config, frame._func_flags, data=frame.data.assign(other_info=None))
+
+    assert frame._with_ephemeris_urls()['ephemeris_url'].isna().all()
+
+
+def test_redirecting_handles_no_targets(config):
+    config.vsx_url = "http://localhost:8000/vsx"
+    frame = vsf.VSFFrame(config).request_targets().filter_targets(dec_range=[80, 90])
+
+    assert len(frame._with_ephemeris_urls()) == 0
+    assert len(frame.scrape_ephemeris()) == 0